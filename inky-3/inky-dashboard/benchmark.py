@@ -0,0 +1,94 @@
+"""
+Rendering benchmarks for the dashboard.
+Run from the dashboard folder: python benchmark.py
+"""
+
+import os
+import time
+from PIL import Image
+
+from modules.layers import load_layer, paste_layer
+from modules.background import get_background
+from modules.compositor import Compositor, numpy_available
+from modules.dither import DITHER_MODES, dither_to_panel
+from modules.palette import quantize_to_panel
+from config import DISPLAY_SIZE
+
+REPEATS = 10
+
+# Full-frame overlays pasted at (0, 0) by the renderer
+OVERLAY_PATHS = [
+    os.path.join("assets", "appliances", f"{name}.png")
+    for name in [
+        "washing_machine_1", "vacuum_1", "sean_building_1", "sean_building_2",
+        "dryer_1", "sean_building_3", "sign", "dishwasher_1", "sean_building_4",
+        "sign_2", "rain_gauge_1",
+    ]
+] + [os.path.join("assets", "backgrounds", "no_sky.png")]
+
+def time_ms(fn, repeats=REPEATS):
+    """Average wall time of fn() in milliseconds."""
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+def bench_overlay_trimming():
+    """Compare pasting full-frame overlays against their trimmed layers."""
+    print("Overlay compositing: full-frame paste vs trimmed layer")
+    frame = Image.new("RGB", DISPLAY_SIZE, "white")
+    total_full = total_trimmed = 0.0
+    for path in OVERLAY_PATHS:
+        full = Image.open(path).convert("RGBA")
+        layer = load_layer(path)
+        full_ms = time_ms(lambda: frame.paste(full, (0, 0), full))
+        trimmed_ms = time_ms(lambda: paste_layer(frame, layer))
+        total_full += full_ms
+        total_trimmed += trimmed_ms
+        area = layer.image.width * layer.image.height if layer else 0
+        print(f"  {os.path.basename(path):24} before {full_ms:7.2f} ms  after {trimmed_ms:7.2f} ms"
+              f"  ({100 * area / (DISPLAY_SIZE[0] * DISPLAY_SIZE[1]):5.1f}% of frame)")
+    print(f"  {'total':24} before {total_full:7.2f} ms  after {total_trimmed:7.2f} ms")
+
+def bench_compositor():
+    """Compare compositing the whole overlay stack with Pillow pastes vs the NumPy compositor."""
+    print("Full stack compositing: Pillow paste vs NumPy premultiplied")
+    if not numpy_available():
+        print("  skipped, NumPy is not installed")
+        return
+    background = get_background()
+    layers = [load_layer(path) for path in OVERLAY_PATHS]
+    box = (0, 0) + DISPLAY_SIZE
+    compositor = Compositor(DISPLAY_SIZE)
+
+    def pillow_stack():
+        frame = background.copy()
+        for layer in layers:
+            paste_layer(frame, layer)
+        return frame
+
+    pillow_ms = time_ms(pillow_stack)
+    numpy_ms = time_ms(lambda: compositor.compose(box, background, layers))
+    import numpy as np
+    diff = np.abs(np.asarray(pillow_stack(), dtype=np.int16) - np.asarray(compositor.compose(box, background, layers), dtype=np.int16))
+    print(f"  {len(layers)} layers: Pillow {pillow_ms:7.2f} ms  NumPy {numpy_ms:7.2f} ms  (max difference {diff.max()})")
+
+def bench_dithering():
+    """Time each dither mode on a full-size photo, against plain nearest-colour mapping."""
+    print(f"Dithering a {DISPLAY_SIZE[0]}x{DISPLAY_SIZE[1]} photo to the panel palette")
+    photo = get_background().convert("RGB")
+    print(f"  {'nearest (no dither)':24} {time_ms(lambda: quantize_to_panel(photo)):7.2f} ms")
+    for mode in DITHER_MODES:
+        if mode != "diffusion" and not numpy_available():
+            print(f"  {mode:24} skipped, NumPy is not installed")
+            continue
+        print(f"  {mode:24} {time_ms(lambda: dither_to_panel(photo, mode)):7.2f} ms")
+
+def main():
+    bench_overlay_trimming()
+    bench_compositor()
+    bench_dithering()
+
+if __name__ == "__main__":
+    main()
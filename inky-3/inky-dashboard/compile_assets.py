@@ -0,0 +1,18 @@
+"""
+Compile assets/ into the memory-mapped bundle used by the renderer.
+Run from the dashboard folder: python compile_assets.py [--force]
+The dashboard also rebuilds the bundle on start-up when assets have changed.
+"""
+
+import sys
+import logging
+
+from modules.asset_bundle import compile_bundle, BUNDLE_PATH
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    if not compile_bundle(force="--force" in sys.argv):
+        print(f"{BUNDLE_PATH} is up to date")
+
+if __name__ == "__main__":
+    main()
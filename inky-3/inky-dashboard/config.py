@@ -12,4 +12,58 @@ SPEAKER_NAME = os.getenv("INKY_SPEAKER_NAME", "VAPPEBY")
 # Logging level for the main app (INFO, DEBUG, WARNING, etc.)
 LOG_LEVEL = os.getenv("INKY_LOG_LEVEL", "INFO")
 
+# Memory budget for decoded images kept by modules/asset_cache.py (megabytes)
+ASSET_CACHE_MB = int(os.getenv("INKY_ASSET_CACHE_MB", "192"))
 
+
+# Use (and rebuild when stale) the pre-compiled asset bundle in build/ instead of decoding assets
+ASSET_BUNDLE = os.getenv("INKY_ASSET_BUNDLE", "1") == "1"
+
+# Frame snapshots written after each display update: "png" for humans, "raw" (uncompressed PPM) for speed
+SNAPSHOT_FORMATS = [f.strip() for f in os.getenv("INKY_SNAPSHOT_FORMATS", "png").split(",") if f.strip()]
+# zlib level for PNG snapshots (0-9); low levels encode much faster on the Pi
+SNAPSHOT_PNG_LEVEL = int(os.getenv("INKY_SNAPSHOT_PNG_LEVEL", "1"))
+
+# Pixel size of the panel and of every rendered frame
+DISPLAY_SIZE = (1600, 1200)
+# Colour set of the e-paper panel ("spectra6" for the 13.3" Impression, "7colour" for older Impressions)
+PANEL_PALETTE = os.getenv("INKY_PANEL_PALETTE", "spectra6")
+# Hand the panel the nearest-colour frame instead of letting the driver dither the RGB
+# frame; either way that frame is what change detection compares. Undithered, painted
+# backgrounds collapse into flat blocks, so leave this off unless the scene is flat art
+SEND_QUANTIZED = os.getenv("INKY_SEND_QUANTIZED", "0") == "1"
+# Dithering of the Spotify screen's album art: "bayer", "ign", "diffusion" or "none"
+# (any mode but "none" sends that screen to the panel already dithered)
+DITHER_MODE = os.getenv("INKY_DITHER", "bayer")
+
+# On-disk album art cache for the Spotify screen and its size budget (megabytes)
+ALBUM_ART_DIR = os.getenv("INKY_ALBUM_ART_DIR", "cache/album_art")
+ALBUM_ART_CACHE_MB = int(os.getenv("INKY_ALBUM_ART_CACHE_MB", "64"))
+
+# Layer compositing for the main scene: "pillow", or "numpy" for the premultiplied-alpha compositor
+COMPOSITOR = os.getenv("INKY_COMPOSITOR", "pillow")
+
+# Threads rasterizing main-scene widgets in parallel (1 renders them in sequence)
+RENDER_WORKERS = int(os.getenv("INKY_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Seconds ahead of a known screen change (cooldown, appliance level, midnight) to pre-render its frame
+PRERENDER_LEAD = int(os.getenv("INKY_PRERENDER_LEAD_S", "120"))
+# Seconds before the current track ends to pre-render the next queued track's Spotify screen
+NEXT_TRACK_LEAD = int(os.getenv("INKY_NEXT_TRACK_LEAD_S", "20"))
+
+# Main dashboard widgets, placement and z-order (see modules.layout_plan)
+LAYOUT_FILE = os.getenv("INKY_LAYOUT_FILE", "layout.json")
+
+# On-disk cache of finished frames keyed by scene fingerprint, and its size budget (megabytes)
+FRAME_CACHE_DIR = os.getenv("INKY_FRAME_CACHE_DIR", "cache/frames")
+FRAME_CACHE_MB = int(os.getenv("INKY_FRAME_CACHE_MB", "256"))
+
+# History of shown frames: where it is kept, how many frames, and a full keyframe every N frames
+HISTORY_DIR = os.getenv("INKY_HISTORY_DIR", "cache/history")
+HISTORY_FRAMES = int(os.getenv("INKY_HISTORY_FRAMES", "288"))
+HISTORY_KEYFRAME_EVERY = int(os.getenv("INKY_HISTORY_KEYFRAME_EVERY", "24"))
+
+# Minimum seconds between panel refreshes for ordinary changes (appliance levels, date)
+MIN_REFRESH_INTERVAL = int(os.getenv("INKY_MIN_REFRESH_S", "60"))
+# Minimum seconds between panel refreshes caused only by weather/calendar drift
+DEFERRED_REFRESH_INTERVAL = int(os.getenv("INKY_DEFERRED_REFRESH_S", "900"))
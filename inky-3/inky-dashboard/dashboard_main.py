@@ -1,55 +1,221 @@
-import time
 import threading
 import os
-from PIL import Image, ImageChops
+from PIL import Image
 import logging
 
-from layout import build_display
+from datetime import datetime
+from layout import collect_scene_inputs, collect_local_inputs, scene_components, scene_fingerprint, changed_causes, render_scene, render_panel_frame, sends_panel_frame, frame_is_cacheable, frame_regions
 from modules.inky_loader import get_auto
 from modules.button_handler import setup_buttons, listen_for_presses
 from modules.state_handler import initialize_state_if_missing
+from modules.asset_cache import get_cache_stats
+from modules.fonts import get_font_stats
+from modules.text_layout import get_text_layout_stats
+from modules.text_sprites import get_sprite_stats
+from modules.frame_diff import FrameComparator
+from modules.snapshot_writer import get_snapshot_writer, snapshot_path
+from modules.palette import quantize_to_panel
+from modules.refresh_scheduler import get_refresh_scheduler
+from modules.display_refresh import run_flask
+from modules.display_worker import DisplayWorker
+from modules.prerender import Prerenderer
+from modules.frame_cache import get_frame_cache
+from modules.frame_history import get_frame_history
 
 # Config
 DISPLAY_UPDATE_INTERVAL = 5
-SIMULATED_OUTPUT_PATH = "simulated_output.png"
 
 # Logging setup
 logging.basicConfig(level=os.getenv("INKY_LOG_LEVEL", "INFO"), format="%(asctime)s [%(levelname)s] %(message)s")
 
-# Inky display
-inky_display = get_auto()()
 
-def images_are_different(new_image, comparison_path=SIMULATED_OUTPUT_PATH):
-    if not os.path.exists(comparison_path): return True
-    try:
-        previous_image = Image.open(comparison_path)
-        diff = ImageChops.difference(new_image.convert("RGB"), previous_image.convert("RGB"))
-        return diff.getbbox() is not None
-    except Exception: return True
+# Ticks that rendered a frame vs ticks skipped because the scene inputs were unchanged
+TICK_STATS = {"rendered": 0, "skipped": 0}
+
+# Tile hashes of the panel-palette frame currently on the panel
+FRAME_COMPARATOR = FrameComparator()
+
+# Decides when changed frames are pushed to the panel
+SCHEDULER = get_refresh_scheduler()
+
+# Finished frames by scene fingerprint, kept across restarts
+FRAME_CACHE = get_frame_cache()
+
+# Compressed history of the frames shown, with why they were shown
+FRAME_HISTORY = get_frame_history()
+
+# frame id -> (image, panel_frame, fingerprint, causes) of frames handed to the display worker but not shown yet
+PENDING_FRAMES = {}
+# The last panel frame the panel confirmed showing, and frame id -> causes of frames that failed to show
+PANEL_STATE = {"shown": None, "failed": {}}
+PANEL_LOCK = threading.Lock()
+
+def on_panel_shown(frame_id, ok):
+    """
+    Called by the display worker after each refresh. A shown frame becomes
+    the panel state (snapshot, restart fingerprint, history); a failure is
+    handed to the loop to roll back and retry.
+    """
+    with PANEL_LOCK:
+        pending = PENDING_FRAMES.pop(frame_id, None)
+        # Older frames were superseded and never reach the panel
+        for stale_id in [i for i in PENDING_FRAMES if i < frame_id]:
+            del PENDING_FRAMES[stale_id]
+        if ok and pending:
+            PANEL_STATE["shown"] = pending[1]
+        elif not ok:
+            PANEL_STATE["failed"][frame_id] = pending[3] if pending else set()
+    if ok and pending:
+        image, panel_frame, fingerprint, causes = pending
+        get_snapshot_writer().submit(image)
+        FRAME_CACHE.save_panel_state(fingerprint)
+        FRAME_HISTORY.record(panel_frame, causes, frame_id, fingerprint)
+    if ok:
+        SCHEDULER.wake()
+    else:
+        SCHEDULER.note_cause("retry")
+
+def roll_back_failed_frames() -> set | None:
+    """
+    If the newest frame sent to the panel failed, make the comparator match
+    what the panel really shows again. Returns the causes of the failed
+    frames, for the re-rendered frame to carry, or None if no retry is needed.
+    """
+    with PANEL_LOCK:
+        failed, PANEL_STATE["failed"] = PANEL_STATE["failed"], {}
+        shown = PANEL_STATE["shown"]
+    # A newer frame is on its way and replaces whatever failed
+    if DISPLAY_WORKER.last_submitted_id not in failed:
+        return None
+    if shown is not None:
+        FRAME_COMPARATOR.remember(shown)
+    else:
+        FRAME_COMPARATOR.forget()
+    logging.warning(f"Panel did not show frame {DISPLAY_WORKER.last_submitted_id}; will retry")
+    return set().union(*failed.values())
+
+# Owns the Inky display; wakes the loop when the panel is free again
+DISPLAY_WORKER = DisplayWorker(get_auto()(), on_shown=on_panel_shown)
+
+# Renders the frame for the next cooldown/appliance/midnight change or queued track ahead of time
+PRERENDERER = Prerenderer(collect_local_inputs, scene_fingerprint, lambda inputs: render_scene(inputs, ahead=True), render_panel_frame)
+
+def seed_previous_frame():
+    """Remember the frame saved by the last run so an unchanged screen isn't refreshed on start."""
+    on_display = FRAME_CACHE.panel_frame_on_display()
+    if on_display:
+        fingerprint, _, panel_frame = on_display
+        FRAME_COMPARATOR.remember(panel_frame)
+        PANEL_STATE["shown"] = panel_frame
+        logging.info(f"Panel already shows cached frame {fingerprint[:8]}")
+        return
+    for path in (snapshot_path("raw"), snapshot_path("png")):
+        if not os.path.exists(path): continue
+        try:
+            with Image.open(path) as previous_image:
+                PANEL_STATE["shown"] = quantize_to_panel(previous_image)
+            FRAME_COMPARATOR.remember(PANEL_STATE["shown"])
+            return
+        except Exception: logging.warning(f"Could not read previous frame snapshot {path}")
 
 def start_button_listener():
     setup_buttons()
     listen_for_presses()
 
+def show_frame(image, panel_frame, diff, frame_id, fingerprint, send_panel_frame, causes=()):
+    """
+    Hand a frame to the display worker. Later frames are compared against it
+    straight away; the snapshot, restart state and history entry follow
+    once it is shown (see on_panel_shown).
+    """
+    with PANEL_LOCK:
+        PENDING_FRAMES[frame_id] = (image, panel_frame, fingerprint, causes)
+    DISPLAY_WORKER.submit(panel_frame if send_panel_frame else image, frame_id)
+    FRAME_COMPARATOR.remember(panel_frame, diff)
+    logging.info(f"Display updated with frame {frame_id} ({', '.join(sorted(causes)) or 'no cause'}): {len(diff.changed_tiles)} tiles, "
+                 f"{diff.changed_fraction:.1%} of pixels changed in {diff.bbox}")
+    logging.debug(f"Asset cache: {get_cache_stats()}, fonts: {get_font_stats()}, text: {get_text_layout_stats()}, sprites: {get_sprite_stats()}, snapshots: {get_snapshot_writer().stats}, "
+                  f"refreshes: {SCHEDULER.stats}, panel: {DISPLAY_WORKER.stats}, prerender: {PRERENDERER.stats}, "
+                  f"frame cache: {FRAME_CACHE.stats}, history: {FRAME_HISTORY.stats}")
+
 def main():
     logging.info("Starting dashboard...")
     initialize_state_if_missing()
+    seed_previous_frame()
     threading.Thread(target=start_button_listener, daemon=True).start()
+    threading.Thread(target=run_flask, daemon=True).start()
     logging.info("Listeners started...")
 
+    last_fingerprint = None
+    last_components = None
+    frame_id = 0
     try:
         while True:
-            image = build_display()
-            if image and images_are_different(image):
-                inky_display.set_image(image)
-                inky_display.show()
-                image.save(SIMULATED_OUTPUT_PATH)
-                logging.info("Display updated")
+            noted = SCHEDULER.take_noted()
+            retried = roll_back_failed_frames() if "retry" in noted else None
+            if retried is not None:
+                last_fingerprint = None
+                noted |= retried
             else:
-                logging.debug("No visual change")
-            time.sleep(DISPLAY_UPDATE_INTERVAL)
+                noted.discard("retry")
+            forced = "manual" in noted
+            now = datetime.now()
+            inputs = collect_scene_inputs(now)
+            components = scene_components(inputs)
+            fingerprint = scene_fingerprint(inputs, components)
+            if fingerprint == last_fingerprint and not forced:
+                TICK_STATS["skipped"] += 1
+                logging.debug(f"Scene unchanged, skipping render ({TICK_STATS})")
+                # Idle tick: get the next predictable change ready
+                if inputs["view"] == "spotify":
+                    PRERENDERER.prepare_next_track(inputs, fingerprint)
+                else:
+                    PRERENDERER.prepare(now, fingerprint, inputs.get("appliances"))
+            else:
+                prepared = PRERENDERER.take(fingerprint)
+                cached = None if prepared else FRAME_CACHE.get(fingerprint)
+                if prepared:
+                    image, panel_frame = prepared.image, prepared.panel_frame
+                    logging.debug(f"Using frame pre-rendered for {prepared.at:%H:%M:%S}")
+                elif cached:
+                    image, panel_frame = cached
+                    logging.debug(f"Using cached frame for scene {fingerprint[:8]}")
+                else:
+                    image = render_scene(inputs)
+                    # Decide on the panel's colours so invisible changes never cost a refresh
+                    panel_frame = render_panel_frame(inputs, image)
+                if panel_frame and not cached and frame_is_cacheable(inputs):
+                    FRAME_CACHE.put(fingerprint, image, panel_frame)
+                TICK_STATS["rendered"] += 1
+                frame_id += 1
+                # Only the layout's dynamic regions are hashed while the background stays the same
+                diff = FRAME_COMPARATOR.compare(panel_frame, *frame_regions(inputs)) if panel_frame else None
+                if diff or (forced and panel_frame):
+                    SCHEDULER.submit((image, panel_frame, diff, frame_id, fingerprint, sends_panel_frame(inputs)), changed_causes(last_components, components) | noted)
+                else:
+                    SCHEDULER.clear()
+                    # The panel already looks like this frame
+                    if panel_frame and not DISPLAY_WORKER.busy:
+                        FRAME_CACHE.save_panel_state(fingerprint)
+                    logging.debug("No visual change")
+                last_fingerprint = fingerprint
+                last_components = components
+
+            # While the panel is busy, newer frames keep replacing the pending one
+            if SCHEDULER.due() and not DISPLAY_WORKER.busy:
+                frame, causes = SCHEDULER.take()
+                show_frame(*frame, causes)
+
+            # Sleep until the next tick, or earlier if a pending frame falls due or a known change arrives
+            wait = SCHEDULER.seconds_until_due()
+            if wait is None or DISPLAY_WORKER.busy: wait = DISPLAY_UPDATE_INTERVAL
+            transition = PRERENDERER.seconds_until_transition(datetime.now(), inputs)
+            SCHEDULER.wait(min(wait, transition, DISPLAY_UPDATE_INTERVAL))
     except KeyboardInterrupt: logging.info("Dashboard stopped")
     except Exception as e: logging.exception("Dashboard crashed")
+    finally:
+        get_snapshot_writer().flush()
+        FRAME_CACHE.flush()
 
 if __name__ == "__main__":
     main()
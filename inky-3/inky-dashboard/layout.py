@@ -1,21 +1,28 @@
-import os
-from PIL import Image, ImageDraw, ImageFont
+import hashlib
 from datetime import datetime, timedelta
 import logging
 
 from colors import COLORS
-from modules.background import load_background
+from modules.background import get_background_with_overlays, get_background_name
 from modules.weather import draw_weather
 from modules.weather_data import get_weather
-from modules.appliances import draw_appliances_and_layers, get_layer_image, get_appliance_state
-from modules.calendar_ui import draw_calendar_text, draw_daniel_note
+from modules.appliances import get_appliance_stack, get_layer_names, get_appliance_state, APPLIANCE_LAYER_ORDER
+from modules.calendar_data import get_calendar_events, next_daniel_day
+from modules.calendar_ui import calendar_key, draw_calendar_text, render_daniel_note
 from modules.cooldown import should_show_cooldown, load_cooldown_image
-from modules.rain_gauge import draw_rain_gauge
+from modules.rain_gauge import get_rain_gauge_layer, get_rain_gauge_level_from_forecast
 from modules.state_handler import initialize_state_if_missing, save_state
-from modules.spotify_display import draw_spotify_screen
+from modules.spotify_connect import get_current_track, get_jam_url, clear_jam_url
+from modules.spotify_display import render_spotify_screen, render_spotify_panel_frame, jam_entry_url
+from modules.album_art import has_album_art, album_art_state
+from modules.layers import Layer
+from modules.scene import render_on_canvas
+from modules.layout_plan import compile_layout, load_layout_spec
+from modules.fonts import get_font
+from modules.palette import quantize_to_panel
+from config import COMPOSITOR, RENDER_WORKERS, DITHER_MODE, SEND_QUANTIZED, LAYOUT_FILE
 
 # Display configuration
-WIDTH, HEIGHT = 1600, 1200
 FONT_SIZE = 36
 HAND_FONT_SIZE = 32
 FONT_PATH = "assets/fonts/GochiHand-Regular.ttf"
@@ -37,75 +44,219 @@ def reset_state_if_empty():
     return appliances
 
 def load_fonts():
-    """Load fonts with fallbacks."""
-    try:
-        font = ImageFont.truetype("arial.ttf", FONT_SIZE)
-    except:
-        font = ImageFont.load_default()
-    
-    try:
-        hand_font = ImageFont.truetype(FONT_PATH, HAND_FONT_SIZE)
-    except:
-        hand_font = font
-    
+    """Load fonts with fallbacks (cached by the font registry)."""
+    font = get_font("arial.ttf", FONT_SIZE)
+    hand_font = get_font(FONT_PATH, HAND_FONT_SIZE, fallback=font)
     return font, hand_font
 
-def build_display():
-    """Build the main display image based on current state."""
-    
+def collect_main_inputs(now=None, events=None):
+    """Gather everything the main dashboard depends on for one frame."""
+    now = now or datetime.now()
+    initialize_state_if_missing()
+    return {
+        "now": now,
+        "weather": get_weather(full_forecast=True),
+        "appliances": reset_state_if_empty(),
+        "events": get_calendar_events() if events is None else events,
+    }
+
+def _weather_key(inputs):
+    weather = inputs["weather"]
+    if "error" in weather:
+        return ("error",)
+    return tuple(weather.get(k) for k in ("temp_min", "temp", "temp_max", "symbol_code"))
+
+def _rain_level(inputs):
+    raw = inputs["weather"].get("raw")
+    return get_rain_gauge_level_from_forecast(raw) if raw else None
+
+def _daniel_days(inputs):
+    return next_daniel_day(inputs["events"], inputs["now"].date())
+
+def _background_source(spec):
+    # Static layers the layout compiler flattened into the background
+    overlays = spec["overlays"]
+    def render(inputs):
+        background = get_background_with_overlays(get_background_name(inputs["now"].date()), overlays)
+        return Layer(background, (0, 0))
+    return lambda i: get_background_name(i["now"].date()), render
+
+def _weather_source(spec):
+    region, (x, y) = spec["region"], spec["position"]
+    def render(inputs):
+        def draw(d, canvas, origin):
+            draw_weather(d, canvas, x - origin[0], y - origin[1], inputs["weather"])
+        return render_on_canvas(region, draw)
+    return _weather_key, render
+
+def _calendar_source(spec):
+    region, (x, y), max_width = spec["region"], spec["position"], spec["max_width"]
+    def render(inputs):
+        _, hand_font = load_fonts()
+        def draw(d, canvas, origin):
+            draw_calendar_text(d, hand_font, start_x=x - origin[0], start_y=y - origin[1], max_width=max_width,
+                               events=inputs["events"], now=inputs["now"])
+        return render_on_canvas(region, draw)
+    return lambda i: (i["now"].date(), calendar_key(i["events"], i["now"])), render
+
+def _daniel_note_source(spec):
+    x, y = spec["position"]
+    def render(inputs):
+        _, hand_font = load_fonts()
+        sprite = render_daniel_note(hand_font, _daniel_days(inputs))
+        if sprite is None:
+            return None
+        return Layer(sprite.image, (x + sprite.offset[0], y + sprite.offset[1]))
+    return _daniel_days, render
+
+def _rain_gauge_source(spec):
+    def render(inputs):
+        raw = inputs["weather"].get("raw")
+        return get_rain_gauge_layer(raw) if raw else None
+    return _rain_level, render
+
+def _appliances_source(spec):
+    order = tuple(spec.get("order") or APPLIANCE_LAYER_ORDER)
+    return (lambda i: get_layer_names(i["appliances"], i["now"], order),
+            lambda i: get_appliance_stack(i["appliances"], i["now"], order))
+
+# Data bindings for layout widget "source" names
+WIDGET_SOURCES = {
+    "background": _background_source,
+    "weather": _weather_source,
+    "calendar": _calendar_source,
+    "daniel_note": _daniel_note_source,
+    "rain_gauge": _rain_gauge_source,
+    "appliances": _appliances_source,
+}
+
+# Compiled once; each scene built from it keeps its own widget caches
+_PLAN = compile_layout(load_layout_spec(LAYOUT_FILE), WIDGET_SOURCES)
+
+def _main_scene(workers=RENDER_WORKERS):
+    """Main dashboard widgets, bottom to top, as laid out in LAYOUT_FILE."""
+    return _PLAN.scene(engine=COMPOSITOR, workers=workers)
+
+_MAIN_SCENE = _main_scene()
+# Renders frames for future times, so pre-rendering doesn't disturb the live scene
+_AHEAD_SCENE = _main_scene(workers=1)
+
+def build_main_dashboard(inputs=None, scene=None):
+    """Render the main dashboard, re-drawing only widgets whose inputs changed."""
+    return (scene or _MAIN_SCENE).render(inputs or collect_main_inputs())
+
+def collect_scene_inputs(now=None):
+    """Decide which view is active and gather the inputs needed to render it."""
+    now = now or datetime.now()
+
     # Priority 1: Spotify view
-    spotify_img = draw_spotify_screen(Image.new("RGBA", (WIDTH, HEIGHT), (0, 0, 0, 255)))
-    if spotify_img is not None:
-        logging.info("Showing Spotify screen")
-        return spotify_img
+    track = get_current_track()
+    if track:
+        return {"view": "spotify", "now": now, "track": track, "jam_url": get_jam_url()}
+    clear_jam_url()
+    return collect_local_inputs(now)
 
+def collect_local_inputs(now, events=None):
+    """
+    Inputs for the cooldown or main view at `now`, which may be in the future
+    (see modules.prerender); only Spotify playback can't be predicted.
+    """
     # Priority 2: Cooldown view
-    cooldown_mode = should_show_cooldown()
+    events = get_calendar_events() if events is None else events
+    cooldown_mode = should_show_cooldown(now, events)
     if cooldown_mode:
-        logging.info("Showing cooldown screen")
-        image = load_cooldown_image(cooldown_mode)
-        return image if image else None
+        return {"view": "cooldown", "now": now, "cooldown_mode": cooldown_mode}
 
     # Priority 3: Main dashboard
-    logging.debug("Building main dashboard")
-    image = load_background()
-    font, hand_font = load_fonts()
-    draw = ImageDraw.Draw(image)
+    inputs = collect_main_inputs(now, events)
+    inputs["view"] = "main"
+    return inputs
 
-    # Get weather data
-    weather_data = get_weather(full_forecast=True)
+def scene_components(inputs) -> dict:
+    """Summaries of the scene inputs keyed by refresh cause (see refresh_scheduler)."""
+    view = inputs["view"]
+    if view == "spotify":
+        # The art state makes a cover that failed to download get retried
+        track = inputs["track"]
+        return {"view": view, "track": (track.get("id"), album_art_state(track)), "jam": inputs["jam_url"] or jam_entry_url()}
+    if view == "cooldown":
+        return {"view": (view, inputs["cooldown_mode"])}
+    components = _MAIN_SCENE.fingerprints(inputs)
+    # The calendar draws the date, but a new day is a "clock" change rather than deferred calendar drift
+    components["clock"] = components.get("clock", ()) + (inputs["now"].date(),)
+    components["view"] = view
+    return components
 
-    # Draw weather section
-    draw_weather(draw, image, WIDTH // 2 - 210, 20, weather_data)
+def changed_causes(previous: dict | None, current: dict) -> set:
+    """Refresh causes whose scene components differ between two scene_components() results."""
+    if previous is None:
+        return {"startup"}
+    if previous.get("view") != current.get("view"):
+        return {"view"}
+    return {cause for cause in current if previous.get(cause) != current[cause]}
 
-    # Apply no-sky overlay
-    try:
-        no_sky_overlay = Image.open("assets/backgrounds/no_sky.png").convert("RGBA")
-        image.paste(no_sky_overlay, (0, 0), no_sky_overlay)
-    except Exception:
-        logging.warning("Could not load no_sky overlay")
+def scene_fingerprint(inputs, components=None) -> str:
+    """
+    Stable digest of everything that affects the rendered frame.
+    Equal fingerprints render to the same image, so rendering can be skipped.
+    """
+    components = components if components is not None else scene_components(inputs)
+    summary = sorted(components.items())
+    return hashlib.sha1(repr(summary).encode("utf-8")).hexdigest()
 
-    # Draw appliances
-    initialize_state_if_missing()
-    appliances = reset_state_if_empty()
-    draw_appliances_and_layers(image, appliances)
+def frame_regions(inputs):
+    """
+    (key, regions) for comparing frames: two main-view frames with the same
+    key can only differ inside the layout's dynamic regions. (None, None)
+    for other views, whose frames must be compared whole.
+    """
+    if inputs["view"] != "main":
+        return None, None
+    return ("main", _PLAN.background_fingerprint(inputs)), _PLAN.dynamic_regions
 
-    # Draw calendar
-    draw_calendar_text(draw, hand_font, start_x=50, start_y=680, max_width=475)
+def frame_is_cacheable(inputs) -> bool:
+    """
+    True if the rendered frame depends on nothing but its fingerprint, so it
+    may be stored and reused (see modules.frame_cache). A Spotify screen drawn
+    with fallback art isn't, as the real cover may arrive later.
+    """
+    if inputs["view"] == "spotify":
+        return has_album_art(inputs["track"])
+    return True
 
-    # Apply foreground layer
-    sign_2_img = get_layer_image("sign_2")
-    if sign_2_img:
-        image.paste(sign_2_img, (0, 0), sign_2_img)
+def render_scene(inputs, ahead=False):
+    """
+    Render the view described by collect_scene_inputs(). `ahead` renders a
+    frame for a future time without touching the live scene's retained state.
+    """
+    view = inputs["view"]
+    if view == "spotify":
+        logging.info("Showing Spotify screen")
+        return render_spotify_screen(inputs["track"], inputs["jam_url"])
 
-    # Draw Daniel's note
-    draw_daniel_note(image, hand_font, x=130, y=333)
+    if view == "cooldown":
+        logging.info("Showing cooldown screen")
+        return load_cooldown_image(inputs["cooldown_mode"])
+
+    logging.debug("Building main dashboard")
+    return build_main_dashboard(inputs, _AHEAD_SCENE if ahead else None)
+
+def _dithers(inputs) -> bool:
+    return inputs["view"] == "spotify" and DITHER_MODE != "none"
 
-    # Draw rain gauge
-    if "raw" in weather_data:
-        try:
-            draw_rain_gauge(image, weather_data["raw"])
-        except Exception:
-            logging.warning("Could not draw rain gauge")
+def render_panel_frame(inputs, image):
+    """
+    The frame in panel colours: the Spotify screen's art is dithered (see
+    DITHER_MODE), anything else is mapped to the nearest colour.
+    """
+    if image is not None and _dithers(inputs):
+        return render_spotify_panel_frame(inputs["track"], inputs["jam_url"])
+    return quantize_to_panel(image) if image else None
 
-    return image
+def sends_panel_frame(inputs) -> bool:
+    """True if the panel should get the panel-colour frame rather than the RGB one."""
+    return SEND_QUANTIZED or _dithers(inputs)
+
+def build_display():
+    """Build the main display image based on current state."""
+    return render_scene(collect_scene_inputs())
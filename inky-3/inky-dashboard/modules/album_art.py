@@ -0,0 +1,189 @@
+"""
+Album art cache for the Spotify screen.
+Downloaded covers are kept on disk in a size-bounded LRU keyed by album (or
+track) id, with a few decoded images held in memory for the current tracks.
+"""
+
+from collections import OrderedDict
+from PIL import Image, ImageDraw
+from io import BytesIO
+import requests
+import os
+import re
+import threading
+import time
+import logging
+from modules.atomic_io import write_bytes_atomic
+from config import ALBUM_ART_DIR, ALBUM_ART_CACHE_MB
+
+__all__ = ["get_album_art", "art_key", "has_album_art", "album_art_state", "get_fallback_art", "get_album_art_stats"]
+
+# The cover is shown 1000 px high; JPEGs are decoded at no more than needed for that
+ART_DECODE_SIZE = (1000, 1000)
+# Decoded covers kept in memory
+MEMORY_ENTRIES = 8
+# Seconds to wait after a failed download before trying that cover again
+RETRY_AFTER = 60
+
+_MEMORY = OrderedDict()  # key -> decoded RGB image
+_FAILED = {}  # key -> monotonic time of the last failed download
+_LOCK = threading.Lock()
+_FALLBACK = None
+_STATS = {"memory_hits": 0, "disk_hits": 0, "downloads": 0, "failures": 0, "disk_evictions": 0}
+
+def art_key(track: dict) -> str | None:
+    """Cache key for a track's cover: the album id, since tracks on an album share art."""
+    return track.get("album_id") or track.get("id")
+
+def _disk_path(key: str) -> str:
+    return os.path.join(ALBUM_ART_DIR, re.sub(r"[^A-Za-z0-9_-]", "_", key) + ".jpg")
+
+def _decode(data: bytes) -> Image.Image:
+    """Decode art, letting the JPEG decoder scale down oversized covers."""
+    image = Image.open(BytesIO(data))
+    image.draft("RGB", ART_DECODE_SIZE)
+    return image.convert("RGB")
+
+def _remember(key: str, image: Image.Image) -> None:
+    with _LOCK:
+        _MEMORY[key] = image
+        _MEMORY.move_to_end(key)
+        while len(_MEMORY) > MEMORY_ENTRIES:
+            _MEMORY.popitem(last=False)
+
+def _store(key: str, data: bytes) -> None:
+    """Write downloaded art to the disk cache and trim it to its budget."""
+    os.makedirs(ALBUM_ART_DIR, exist_ok=True)
+    write_bytes_atomic(_disk_path(key), data)
+    _prune_disk()
+
+def _prune_disk() -> None:
+    """Remove least recently used files until the cache fits ALBUM_ART_CACHE_MB."""
+    entries = []
+    with os.scandir(ALBUM_ART_DIR) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(".jpg"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    budget = ALBUM_ART_CACHE_MB * 1024 * 1024
+    for _, size, path in sorted(entries):
+        if total <= budget:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            _STATS["disk_evictions"] += 1
+        except OSError:
+            pass
+
+def _load_from_disk(key: str) -> Image.Image | None:
+    path = _disk_path(key)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # mark as recently used
+        return _decode(data)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"Dropping unreadable cached album art {path}: {e}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+def get_fallback_art() -> Image.Image:
+    """A plain record-sleeve image for when no cover can be fetched."""
+    global _FALLBACK
+    if _FALLBACK is None:
+        size = 640
+        image = Image.new("RGB", (size, size), (40, 40, 40))
+        draw = ImageDraw.Draw(image)
+        centre = size // 2
+        for radius, colour in ((250, (15, 15, 15)), (200, (25, 25, 25)), (150, (15, 15, 15)), (70, (200, 40, 40)), (8, (40, 40, 40))):
+            draw.ellipse((centre - radius, centre - radius, centre + radius, centre + radius), fill=colour)
+        _FALLBACK = image
+    return _FALLBACK
+
+def has_album_art(track: dict) -> bool:
+    """True if the track's real cover is cached, i.e. rendering it won't fall back."""
+    key = art_key(track)
+    if key is None or not track.get("art_url"):
+        return False
+    with _LOCK:
+        if key in _MEMORY:
+            return True
+    return os.path.exists(_disk_path(key))
+
+def _retry_pending(key: str) -> bool:
+    """True while a failed download of `key` is waiting out RETRY_AFTER."""
+    with _LOCK:
+        failed_at = _FAILED.get(key)
+    return failed_at is not None and time.monotonic() - failed_at < RETRY_AFTER
+
+def album_art_state(track: dict) -> str:
+    """
+    "cached" if the cover is available, "failed" while a failed download
+    waits to be retried, else "missing" (the next render will download it).
+    Changes whenever rendering the track would give a different cover.
+    """
+    if has_album_art(track):
+        return "cached"
+    key = art_key(track)
+    return "failed" if key is not None and _retry_pending(key) else "missing"
+
+def get_album_art(track: dict) -> tuple[Image.Image, str]:
+    """
+    Cover for the track and the key it is cached under ("fallback" if it
+    couldn't be fetched). The image is shared and must not be modified.
+    """
+    key = art_key(track)
+    if key is None or not track.get("art_url"):
+        return get_fallback_art(), "fallback"
+
+    with _LOCK:
+        image = _MEMORY.get(key)
+        if image is not None:
+            _MEMORY.move_to_end(key)
+            _STATS["memory_hits"] += 1
+            return image, key
+
+    image = _load_from_disk(key)
+    if image is not None:
+        _STATS["disk_hits"] += 1
+        logging.debug(f"Loaded album art {key} from disk cache")
+        _remember(key, image)
+        return image, key
+
+    if _retry_pending(key):
+        return get_fallback_art(), "fallback"
+    try:
+        response = requests.get(track["art_url"], timeout=5)
+        response.raise_for_status()
+        image = _decode(response.content)
+    except Exception as e:
+        _STATS["failures"] += 1
+        with _LOCK:
+            _FAILED[key] = time.monotonic()
+        logging.error(f"Album art download failed, using fallback for {RETRY_AFTER}s: {e}")
+        return get_fallback_art(), "fallback"
+
+    _STATS["downloads"] += 1
+    with _LOCK:
+        _FAILED.pop(key, None)
+    logging.debug("Downloaded album art from Spotify")
+    try:
+        _store(key, response.content)
+    except Exception as e:
+        logging.warning(f"Could not cache album art on disk: {e}")
+    _remember(key, image)
+    return image, key
+
+def get_album_art_stats() -> dict:
+    """Return album art cache counters."""
+    with _LOCK:
+        stats = dict(_STATS)
+        stats["memory_entries"] = len(_MEMORY)
+    return stats
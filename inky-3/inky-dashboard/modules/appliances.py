@@ -1,7 +1,10 @@
 from datetime import datetime, timedelta
 from PIL import Image
 import os
+import logging
 from modules.state_handler import get_appliance_state as state_handler_get
+from modules.asset_cache import load_image
+from modules.layers import Layer, load_layer, paste_layer, trim_layer, union_box
 
 # Order in which appliance layers are drawn
 APPLIANCE_LAYER_ORDER = [
@@ -17,9 +20,17 @@ APPLIANCE_RUNNING_TIMERS = {
     "dishwasher": timedelta(hours=2),
 }
 
-def get_status_image_name(last_run: datetime, is_running: bool, prefix: str) -> str:
+# Days since the last run at which an idle appliance moves to its next status image
+APPLIANCE_LEVEL_DAYS = [1, 3, 7]
+
+# Pre-flattened appliance/building stacks by layer names, rebuilt only when a status image changes.
+# A few are kept so a pre-rendered future frame doesn't evict the current one.
+_STACK_CACHE = {}
+MAX_CACHED_STACKS = 4
+
+def get_status_image_name(last_run: datetime, is_running: bool, prefix: str, now: datetime | None = None) -> str:
     """Return the correct image name for an appliance based on last run and running state."""
-    now = datetime.now()
+    now = now or datetime.now()
     elapsed = now - last_run
 
     if is_running:
@@ -39,30 +50,79 @@ def get_layer_image(name: str):
     """Load a PNG layer image by name from the appliances folder."""
     path = os.path.join("assets", "appliances", f"{name}.png")
     try:
-        return Image.open(path).convert("RGBA")
+        return load_image(path, "RGBA")
     except Exception:
         return None
 
-def get_appliance_state():
+def get_layer(name: str) -> Layer | None:
+    """Load an appliances-folder PNG as a trimmed layer (see modules.layers)."""
+    path = os.path.join("assets", "appliances", f"{name}.png")
+    try:
+        return load_layer(path)
+    except Exception:
+        return None
+
+def get_appliance_state(save=True):
     """Get the current appliance state from the state handler."""
-    return state_handler_get()
+    return state_handler_get(save)
 
-def draw_appliances_and_layers(image: Image.Image, appliance_data: list[dict]) -> None:
-    """Draw all appliance and building layers onto the given image."""
-    for name in APPLIANCE_LAYER_ORDER:
-        img = None
+def get_layer_names(appliance_data: list[dict], now: datetime | None = None, order=None) -> tuple:
+    """Resolve `order` (default APPLIANCE_LAYER_ORDER) to the layer image names to draw, bottom to top."""
+    names = []
+    for name in order or APPLIANCE_LAYER_ORDER:
         if name.startswith("sean_building") or name == "sign":
-            img = get_layer_image(name)
+            names.append(name)
         else:
             appliance = next((a for a in appliance_data if a["prefix"] == name), None)
             if appliance:
-                image_name = get_status_image_name(appliance["last_run"], appliance["is_running"], name)
-                img = get_layer_image(image_name)
-        if img:
-            image.paste(img, (0, 0), img)
+                names.append(get_status_image_name(appliance["last_run"], appliance["is_running"], name, now))
+    return tuple(names)
+
+def build_appliance_stack(layer_names: tuple) -> Layer | None:
+    """Flatten the given layers into a single trimmed RGBA layer."""
+    layers = [layer for layer in (get_layer(name) for name in layer_names) if layer]
+    box = union_box(layers)
+    if box is None:
+        return None
+    stack = Image.new("RGBA", (box[2] - box[0], box[3] - box[1]), (0, 0, 0, 0))
+    for layer in layers:
+        stack.alpha_composite(layer.image, (layer.offset[0] - box[0], layer.offset[1] - box[1]))
+    return trim_layer(stack, box[:2])
+
+def get_appliance_stack(appliance_data: list[dict], now: datetime | None = None, order=None) -> Layer | None:
+    """Return the flattened appliance/building layer for the status levels at `now`."""
+    key = get_layer_names(appliance_data, now, order)
+    if key not in _STACK_CACHE:
+        logging.debug(f"Rebuilding appliance stack for {key}")
+        if len(_STACK_CACHE) >= MAX_CACHED_STACKS:
+            _STACK_CACHE.pop(next(iter(_STACK_CACHE)))
+        _STACK_CACHE[key] = build_appliance_stack(key)
+    return _STACK_CACHE[key]
+
+def next_status_change(appliance_data: list[dict], now: datetime | None = None) -> datetime | None:
+    """The earliest time after `now` at which an appliance's status image changes."""
+    now = now or datetime.now()
+    times = []
+    for appliance in appliance_data:
+        last_run = appliance["last_run"]
+        if appliance["is_running"]:
+            run_time = APPLIANCE_RUNNING_TIMERS.get(appliance["prefix"], timedelta(hours=1))
+            times.append(last_run + run_time)
+        else:
+            times.extend(last_run + timedelta(days=days) for days in APPLIANCE_LEVEL_DAYS)
+    future = [t for t in times if t > now]
+    return min(future) if future else None
+
+def draw_appliances_and_layers(image: Image.Image, appliance_data: list[dict]) -> None:
+    """Draw all appliance and building layers onto the given image."""
+    paste_layer(image, get_appliance_stack(appliance_data))
 
 __all__ = [
     "draw_appliances_and_layers",
+    "get_appliance_stack",
+    "get_layer_names",
+    "next_status_change",
     "get_layer_image",
+    "get_layer",
     "get_appliance_state"
 ]
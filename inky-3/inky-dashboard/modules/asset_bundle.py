@@ -0,0 +1,190 @@
+"""
+Pre-compiled asset bundle.
+compile_bundle() decodes the assets the renderer uses, scales, converts and
+trims them once, and stores the raw pixels in build/assets.bin with a JSON
+index. At runtime the bundle is memory-mapped and images are wrapped around
+slices of it instead of being decoded. The bundle is rebuilt on start-up
+whenever a source file has changed.
+"""
+
+import glob
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+import logging
+from PIL import Image
+from modules.atomic_io import write_atomic, write_bytes_atomic
+from config import ASSET_BUNDLE, DISPLAY_SIZE
+
+__all__ = ["compile_bundle", "bundle_is_stale", "asset_signature", "get_asset_bundle", "bundle_lookup", "BUNDLE_RULES"]
+
+BUNDLE_DIR = "build"
+BUNDLE_PATH = os.path.join(BUNDLE_DIR, "assets.bin")
+INDEX_PATH = os.path.join(BUNDLE_DIR, "assets.json")
+BUNDLE_VERSION = 1
+# Entries start on this boundary within the bundle
+ALIGN = 64
+
+# Source files -> the variant the renderer loads them as (see asset_cache/layers)
+BUNDLE_RULES = [
+    (os.path.join("assets", "appliances", "*.png"), ("layer",)),
+    (os.path.join("assets", "backgrounds", "no_sky.png"), ("layer",)),
+    (os.path.join("assets", "backgrounds", "*.jpg"), ("image", "RGB", DISPLAY_SIZE)),
+    (os.path.join("assets", "weather", "*.png"), ("image", "RGBA", (200, 200))),
+    (os.path.join("assets", "cooldown", "*.png"), ("image", "RGB", None)),
+]
+
+def _entry_key(rel_path: str, variant) -> str:
+    return f"{rel_path}|{json.dumps(list(variant))}"
+
+def _source_stat(path: str) -> list:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def _sources() -> list:
+    """(relative path, variant) for every file the rules match."""
+    found = []
+    for pattern, variant in BUNDLE_RULES:
+        for path in sorted(glob.glob(pattern)):
+            if os.path.getsize(path) > 0:
+                found.append((os.path.normpath(path), variant))
+    return found
+
+def asset_signature() -> str:
+    """Digest of the size and mtime of every bundled source, to tell when assets changed."""
+    try:
+        current = [[path] + _source_stat(path) for path, _ in _sources()]
+    except OSError:
+        current = []
+    return hashlib.sha1(json.dumps(current).encode()).hexdigest()
+
+def _read_index() -> dict | None:
+    try:
+        with open(INDEX_PATH) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return index if index.get("version") == BUNDLE_VERSION else None
+
+def bundle_is_stale(index: dict | None = None) -> bool:
+    """True if the bundle is missing or any source file was added, removed or changed."""
+    index = index or _read_index()
+    if index is None or not os.path.exists(BUNDLE_PATH):
+        return True
+    try:
+        current = {path: _source_stat(path) for path, _ in _sources()}
+    except OSError:
+        return True
+    return current != index["sources"]
+
+def _decode(path: str, variant):
+    """Decode a source exactly as the runtime loaders would: (image, offset) or None."""
+    from modules.asset_cache import decode_image
+    from modules.layers import decode_layer
+
+    if variant[0] == "layer":
+        layer = decode_layer(path)
+        return (layer.image, layer.offset) if layer else None
+    _, mode, size = variant
+    return decode_image(path, mode, size), (0, 0)
+
+def compile_bundle(force: bool = False) -> bool:
+    """Build the bundle if it is stale (or `force`). Returns True if it was rebuilt."""
+    if not force and not bundle_is_stale():
+        return False
+
+    start = time.perf_counter()
+    os.makedirs(BUNDLE_DIR, exist_ok=True)
+    entries, sources, blobs = {}, {}, []
+    position = 0
+    for path, variant in _sources():
+        sources[path] = _source_stat(path)
+        try:
+            decoded = _decode(path, variant)
+        except Exception as e:
+            logging.warning(f"Skipping {path} in asset bundle: {e}")
+            continue
+        if decoded is None:
+            entries[_entry_key(path, variant)] = {"empty": True}
+            continue
+        image, offset = decoded
+        data = image.tobytes()
+        position += -position % ALIGN
+        entries[_entry_key(path, variant)] = {
+            "mode": image.mode,
+            "size": list(image.size),
+            "offset": list(offset),
+            "start": position,
+            "length": len(data),
+        }
+        blobs.append((position, data))
+        position += len(data)
+
+    def write_bundle(f):
+        for blob_start, data in blobs:
+            f.write(b"\0" * (blob_start - f.tell()))
+            f.write(data)
+
+    write_atomic(BUNDLE_PATH, write_bundle)
+    index = {"version": BUNDLE_VERSION, "sources": sources, "entries": entries}
+    write_bytes_atomic(INDEX_PATH, json.dumps(index, indent=1).encode())
+    logging.info(f"Compiled {len(entries)} assets into {BUNDLE_PATH} ({position / 1e6:.1f} MB) "
+                 f"in {time.perf_counter() - start:.1f} s")
+    return True
+
+class AssetBundle:
+    """A memory-mapped bundle and its index."""
+
+    def __init__(self):
+        self.index = _read_index()
+        with open(BUNDLE_PATH, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+    def lookup(self, path: str, variant):
+        """
+        (image, offset) for a source file, or None if it isn't in the bundle or
+        changed since it was compiled. ("empty" layers give (None, None).)
+        Images share the mapped memory and are read-only.
+        """
+        rel_path = os.path.normpath(os.path.relpath(path))
+        entry = self.index["entries"].get(_entry_key(rel_path, variant))
+        if entry is None:
+            return None
+        try:
+            if _source_stat(rel_path) != self.index["sources"].get(rel_path):
+                return None
+        except OSError:
+            return None
+        if entry.get("empty"):
+            return None, None
+        mode, size = entry["mode"], tuple(entry["size"])
+        data = self._view[entry["start"]:entry["start"] + entry["length"]]
+        image = Image.frombuffer(mode, size, data, "raw", mode, 0, 1)
+        return image, tuple(entry["offset"])
+
+_asset_bundle = None
+_bundle_lock = threading.Lock()
+
+def get_asset_bundle():
+    """The shared bundle, compiled first if stale. None if bundles are disabled or unusable."""
+    global _asset_bundle
+    if not ASSET_BUNDLE:
+        return None
+    with _bundle_lock:
+        if _asset_bundle is None:
+            try:
+                compile_bundle()
+                _asset_bundle = AssetBundle()
+            except Exception as e:
+                logging.warning(f"Asset bundle unavailable, decoding assets directly: {e}")
+                _asset_bundle = False
+    return _asset_bundle or None
+
+def bundle_lookup(path: str, variant):
+    """Shortcut for get_asset_bundle().lookup() that returns None without a bundle."""
+    bundle = get_asset_bundle()
+    return bundle.lookup(path, variant) if bundle else None
@@ -0,0 +1,117 @@
+"""
+Process-wide cache for decoded image assets.
+Keeps decoded, mode-converted images in memory so the renderer does not
+re-open and re-decode the same PNG/JPG files on every display tick.
+"""
+
+from collections import OrderedDict
+from PIL import Image
+import os
+import threading
+import logging
+from config import ASSET_CACHE_MB
+from modules.asset_bundle import bundle_lookup
+
+# Maximum number of bytes of decoded pixel data kept in memory
+MAX_CACHE_BYTES = ASSET_CACHE_MB * 1024 * 1024
+
+# (abs path, variant...) -> {"mtime": float, "value": object, "bytes": int}
+_CACHE = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_STATS = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0,
+    "invalidations": 0,
+    "bytes": 0,
+}
+
+def _image_bytes(image: Image.Image) -> int:
+    """Approximate the memory used by an image's pixel data."""
+    width, height = image.size
+    return width * height * len(image.getbands())
+
+def _evict_if_needed() -> None:
+    """Drop least recently used entries until the cache fits its budget."""
+    while _CACHE and _STATS["bytes"] > MAX_CACHE_BYTES:
+        key, entry = _CACHE.popitem(last=False)
+        _STATS["bytes"] -= entry["bytes"]
+        _STATS["evictions"] += 1
+        logging.debug(f"Evicted {key[0]} from asset cache")
+
+def load_cached(path: str, variant: tuple, decode, size_of=_image_bytes):
+    """
+    Return decode(abs_path) for a file, cached per (path, variant) until the
+    file's mtime changes. `size_of(value)` reports the bytes held by the value.
+    """
+    abs_path = os.path.abspath(path)
+    mtime = os.stat(abs_path).st_mtime
+    key = (abs_path,) + tuple(variant)
+
+    with _CACHE_LOCK:
+        entry = _CACHE.get(key)
+        if entry is not None:
+            if entry["mtime"] == mtime:
+                _CACHE.move_to_end(key)
+                _STATS["hits"] += 1
+                return entry["value"]
+            # File changed on disk since it was cached
+            del _CACHE[key]
+            _STATS["bytes"] -= entry["bytes"]
+            _STATS["invalidations"] += 1
+
+    value = decode(abs_path)
+
+    with _CACHE_LOCK:
+        _STATS["misses"] += 1
+        nbytes = size_of(value)
+        if nbytes <= MAX_CACHE_BYTES:
+            old = _CACHE.pop(key, None)
+            if old is not None:
+                _STATS["bytes"] -= old["bytes"]
+            _CACHE[key] = {"mtime": mtime, "value": value, "bytes": nbytes}
+            _STATS["bytes"] += nbytes
+            _evict_if_needed()
+    return value
+
+def decode_image(path: str, mode: str, size: tuple[int, int] | None = None) -> Image.Image:
+    """Decode a file, convert it to `mode` and resize it to `size` if given."""
+    with Image.open(path) as raw:
+        image = raw.convert(mode)
+    if size and image.size != size:
+        image = image.resize(size)
+    return image
+
+def load_image(path: str, mode: str = "RGBA", size: tuple[int, int] | None = None) -> Image.Image:
+    """
+    Return a decoded image converted to `mode` (and resized to `size` if given).
+    Images come from the compiled asset bundle when it has them.
+    The returned image is shared between callers: copy() it before drawing on it.
+    Raises the same exceptions as Image.open if the file can't be read.
+    """
+    size = tuple(size) if size else None
+    variant = ("image", mode, size)
+
+    def decode(abs_path):
+        found = bundle_lookup(abs_path, variant)
+        if found is not None:
+            return found[0]
+        return decode_image(abs_path, mode, size)
+
+    return load_cached(path, variant, decode)
+
+def get_cache_stats() -> dict:
+    """Return hit/miss counters and current memory usage of the cache."""
+    with _CACHE_LOCK:
+        stats = dict(_STATS)
+        stats["entries"] = len(_CACHE)
+        stats["max_bytes"] = MAX_CACHE_BYTES
+    return stats
+
+def clear_cache() -> None:
+    """Drop every cached image (counters are kept)."""
+    with _CACHE_LOCK:
+        _CACHE.clear()
+        _STATS["bytes"] = 0
+
+__all__ = ["load_image", "load_cached", "decode_image", "get_cache_stats", "clear_cache"]
@@ -0,0 +1,38 @@
+"""
+Atomic file writes.
+Data is written to a temp file in the target's directory and renamed over
+the target, so readers (and a restart after a power cut) see either the old
+file or the new one, never a partial write.
+"""
+
+import os
+import tempfile
+
+__all__ = ["write_atomic", "write_bytes_atomic"]
+
+def write_atomic(path: str, write, text: bool = False) -> int:
+    """
+    Call write(f) on a temp file next to `path`, then rename it over `path`.
+    Returns the bytes written. If anything fails the temp file is removed
+    and the error raised; `path` is left untouched.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp",
+                                    dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "w" if text else "wb") as tmp_f:
+            write(tmp_f)
+            tmp_f.flush()
+            size = os.fstat(tmp_f.fileno()).st_size
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+        return size
+    finally:
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except OSError:
+            pass
+
+def write_bytes_atomic(path: str, data: bytes) -> int:
+    """Atomically replace `path` with `data`."""
+    return write_atomic(path, lambda f: f.write(data))
@@ -1,26 +1,116 @@
 """
 Background image loader for the dashboard display.
-Currently hardcoded to use spring background.
+Picks a holiday or seasonal background by date, falling back to spring.
 """
 
 from PIL import Image
+from datetime import date
 import os
+import logging
+from modules.asset_cache import load_image, load_cached
+from modules.layers import load_layer, paste_layer
+from config import DISPLAY_SIZE
 
-# Display configuration
-DISPLAY_SIZE = (1600, 1200)
-BACKGROUND_PATH = os.path.join("assets", "backgrounds", "spring.jpg")
+BACKGROUND_DIR = os.path.join("assets", "backgrounds")
+DEFAULT_BACKGROUND = "spring"
+
+# Meteorological seasons by month
+SEASONS = {
+    12: "winter", 1: "winter", 2: "winter",
+    3: "spring", 4: "spring", 5: "spring",
+    6: "summer", 7: "summer", 8: "summer",
+    9: "autumn", 10: "autumn", 11: "autumn",
+}
+
+# (name, first (month, day), last (month, day)); used when backgrounds/<name>.jpg exists
+HOLIDAYS = [
+    ("christmas", (12, 1), (12, 26)),
+    ("constitution_day", (5, 17), (5, 17)),
+    ("halloween", (10, 31), (10, 31)),
+]
+
+def background_path(name: str) -> str:
+    return os.path.join(BACKGROUND_DIR, f"{name}.jpg")
 
 def get_season_for_date(today=None):
-    """Get the current season. Currently hardcoded to spring."""
-    return "spring"
+    """Get the season ("winter", "spring", "summer" or "autumn") for a date."""
+    today = today or date.today()
+    return SEASONS[today.month]
 
-def load_background(season=None):
-    """Load and resize the background image for the display."""
+def get_holiday_for_date(today=None):
+    """Get the holiday a date falls in, or None."""
+    today = today or date.today()
+    for name, first, last in HOLIDAYS:
+        if first <= (today.month, today.day) <= last:
+            return name
+    return None
+
+def get_background_name(today=None):
+    """The background to show on a date: holiday, then season, then spring, whichever exists first."""
+    for name in (get_holiday_for_date(today), get_season_for_date(today)):
+        if name and os.path.exists(background_path(name)):
+            return name
+    return DEFAULT_BACKGROUND
+
+def get_background(season=None):
+    """Return the shared, cached background image (pre-scaled to DISPLAY_SIZE). Do not draw on it."""
     try:
-        image = Image.open(BACKGROUND_PATH).convert("RGB")
-        return image.resize(DISPLAY_SIZE)
+        return load_image(background_path(season or get_background_name()), "RGB", DISPLAY_SIZE)
     except Exception:
         # Return white background as fallback
         return Image.new("RGB", DISPLAY_SIZE, "white")
 
-__all__ = ["load_background", "get_season_for_date"]
+def get_background_with_overlays(season, overlays):
+    """
+    The background with full-frame overlays already pasted on, bottom to top,
+    cached like the background itself. `overlays` holds (path, keep_out)
+    pairs; inside an overlay's `keep_out` box (or None) the frame is left as
+    it was before that overlay, for widgets that must be drawn in between;
+    paste the overlay clipped to that box above them. Do not draw on the result.
+    """
+    season = season or get_background_name()
+    overlays = tuple((path, tuple(keep_out) if keep_out else None) for path, keep_out in overlays)
+    if not overlays:
+        return get_background(season)
+
+    def merge(_abs_path=None):
+        merged = get_background(season).copy()
+        for overlay_path, keep_out in overlays:
+            try:
+                layer = load_layer(overlay_path)
+            except Exception as e:
+                logging.warning(f"Could not load overlay {overlay_path}: {e}")
+                continue
+            kept = merged.crop(keep_out) if keep_out else None
+            paste_layer(merged, layer)
+            if kept:
+                merged.paste(kept, keep_out[:2])
+        return merged
+
+    try:
+        variant = ("merged",) + tuple(
+            (os.path.abspath(path), os.stat(path).st_mtime, keep_out) for path, keep_out in overlays)
+        return load_cached(background_path(season), variant, merge)
+    except Exception as e:
+        # Merge uncached onto the fallback so the overlays still show
+        logging.warning(f"Could not cache overlays merged onto the {season} background: {e}")
+        return merge()
+
+def get_background_with_overlay(season, overlay_path: str, keep_out=None):
+    """The background with one overlay pasted on; see get_background_with_overlays()."""
+    return get_background_with_overlays(season, [(overlay_path, keep_out)])
+
+def load_background(season=None):
+    """Load and resize the background image for the display."""
+    # Copy so callers can draw on it without touching the cached asset
+    return get_background(season).copy()
+
+__all__ = [
+    "load_background",
+    "get_background",
+    "get_background_with_overlay",
+    "get_background_with_overlays",
+    "get_background_name",
+    "get_season_for_date",
+    "get_holiday_for_date",
+]
@@ -10,6 +10,7 @@ import time
 import logging
 from modules.state_handler import mark_appliance_run, load_state
 from modules.spotify_connect import get_spotify_client
+from modules.refresh_scheduler import get_refresh_scheduler
 
 # GPIO configuration
 BUTTONS = [5, 6, 25, 24]  # BCM GPIO numbers
@@ -91,6 +92,9 @@ def handle_button_press(label):
         except Exception as e:
             logging.error(f"Spotify action '{action}' failed: {e}")
 
+    # Wake the main loop so the result is shown without waiting for the next tick
+    get_refresh_scheduler().note_cause("button")
+
 def handle_button(event):
     """Handle button press events from gpiod."""
     index = OFFSETS.index(event.line_offset)
@@ -177,10 +177,11 @@ def get_calendar_events():
     """Fetch upcoming Google Calendar events (backward compatibility)."""
     return get_calendar_client().get_calendar_events()
 
-def next_daniel_day():
+def next_daniel_day(events=None, today=None):
     """Return the number of days until the next event with 'daniel' in the summary."""
-    events = get_calendar_events()
-    today = datetime.now().date()
+    if events is None:
+        events = get_calendar_events()
+    today = today or datetime.now().date()
     
     for offset in range(0, 30):
         check_date = str(today + timedelta(days=offset))
@@ -1,8 +1,12 @@
 from datetime import datetime, timedelta
 from modules.calendar_data import get_calendar_events, next_daniel_day
+from modules.text_layout import wrap_text
+from modules.fonts import font_key
+from modules.text_sprites import render_text_sprite
+from modules.layers import Layer
 from PIL import ImageDraw, ImageFont, Image
 
-__all__ = ["draw_calendar_text", "draw_daniel_note"]
+__all__ = ["calendar_key", "draw_calendar_text", "layout_calendar_text", "draw_daniel_note", "get_daniel_note_text", "render_daniel_note"]
 
 # Color constants (define here for self-containment, or import if COLORS is used elsewhere)
 COLORS = {
@@ -10,84 +14,109 @@ COLORS = {
     "red": (255, 0, 0),
 }
 
-def draw_calendar_text(draw: ImageDraw.ImageDraw, hand_font: ImageFont.ImageFont, start_x: int, start_y: int, max_width: int) -> int:
-    """Draw today's and tomorrow's calendar events on the image."""
-    events = get_calendar_events()
-    today_str = str(datetime.now().date())
-    tomorrow_str = str((datetime.now().date() + timedelta(days=1)))
-    text_y = start_y
+# The note is centred on a tall, narrow card and tilted
+NOTE_CANVAS = (100, 1200)
+NOTE_ANGLE = 22
+
+# (today, tomorrow, events shown, font, max_width) -> (draw ops, height)
+_LAYOUT_CACHE = {}
+MAX_LAYOUT_ENTRIES = 16
+
+def calendar_key(events: dict, now: datetime) -> tuple:
+    """The part of `events` the calendar text depends on: today's and tomorrow's, in drawing order."""
+    today_str = str(now.date())
+    tomorrow_str = str((now.date() + timedelta(days=1)))
+    return tuple(
+        (date_str, tuple((event["time"], event["summary"]) for event in day_events))
+        for date_str, day_events in events.items()
+        if date_str in (today_str, tomorrow_str)
+    )
+
+def layout_calendar_text(hand_font: ImageFont.ImageFont, max_width: int, events: dict, now: datetime):
+    """
+    Lay out today's and tomorrow's events as (dx, dy, text, colour) draw ops
+    relative to the text origin. Returns (ops, height); results are cached.
+    """
+    today_str = str(now.date())
+    tomorrow_str = str((now.date() + timedelta(days=1)))
+    key = (today_str, calendar_key(events, now), font_key(hand_font), max_width)
+    cached = _LAYOUT_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    ops = []
+    text_y = 0
     line_count = 0
     max_lines = 5
 
     for date_str, day_events in events.items():
         if date_str == today_str:
-            date_label = datetime.now().strftime("%d. %B %Y").lstrip("0")
-            draw.text((start_x, text_y), f"{date_label}:", fill=COLORS["red"], font=hand_font)
+            date_label = now.strftime("%d. %B %Y").lstrip("0")
+            ops.append((0, text_y, f"{date_label}:", COLORS["red"]))
         elif date_str == tomorrow_str:
-            draw.text((start_x, text_y), "I morgen:", fill=COLORS["red"], font=hand_font)
+            ops.append((0, text_y, "I morgen:", COLORS["red"]))
         else:
             continue
 
         text_y += 38
-        day_events.sort(key=lambda x: (x["time"] != "All Day", x["time"]))
+        day_events = sorted(day_events, key=lambda x: (x["time"] != "All Day", x["time"]))
 
         for event in day_events:
             if line_count == max_lines - 1:
-                draw.text((start_x + 20, text_y), "flere hendelser...", fill=COLORS["red"], font=hand_font)
-                return text_y + 28
-
-            full_text = f"{event['time']} - {event['summary']}"
-            words = full_text.split()
-            line = ""
-            lines = []
-            for word in words:
-                test = line + word + " "
-                w = draw.textbbox((0, 0), test, font=hand_font)[2]
-                if w <= max_width:
-                    line = test
-                else:
-                    lines.append(line.strip())
-                    line = word + " "
-            lines.append(line.strip())
-
-            for wrapped_line in lines:
-                draw.text((start_x + 20, text_y), wrapped_line, fill=COLORS["black"], font=hand_font)
+                ops.append((20, text_y, "flere hendelser...", COLORS["red"]))
                 text_y += 28
-                line_count += 1
+                break
 
-        text_y += 10
+            for wrapped_line in wrap_text(hand_font, f"{event['time']} - {event['summary']}", max_width):
+                ops.append((20, text_y, wrapped_line, COLORS["black"]))
+                text_y += 28
+                line_count += 1
+        else:
+            text_y += 10
+            continue
+        break
 
-    return text_y
+    if len(_LAYOUT_CACHE) >= MAX_LAYOUT_ENTRIES:
+        _LAYOUT_CACHE.clear()
+    _LAYOUT_CACHE[key] = (ops, text_y)
+    return ops, text_y
 
-def draw_daniel_note(image: Image.Image, hand_font: ImageFont.ImageFont, x: int, y: int) -> None:
-    """Draw a vertical note about the next Daniel event."""
-    days = next_daniel_day()
+def draw_calendar_text(draw: ImageDraw.ImageDraw, hand_font: ImageFont.ImageFont, start_x: int, start_y: int, max_width: int,
+                       events: dict | None = None, now: datetime | None = None) -> int:
+    """Draw today's and tomorrow's calendar events on the image."""
+    if events is None:
+        events = get_calendar_events()
+    now = now or datetime.now()
+    ops, height = layout_calendar_text(hand_font, max_width, events, now)
+    for dx, dy, text, colour in ops:
+        draw.text((start_x + dx, start_y + dy), text, fill=colour, font=hand_font)
+    return start_y + height
+
+def get_daniel_note_text(days: int | None) -> str | None:
+    """Return the note text for the given number of days until Daniel, or None."""
     if days is None:
-        return
+        return None
 
     if days == 0:
-        text = "Daniel\n i dag!\n <3"
+        return "Daniel\n i dag!\n <3"
     elif days == 1:
-        text = "Daniel\n i morgen!"
+        return "Daniel\n i morgen!"
     else:
-        text = f"Daniel\nom {days} \ndager"
-
-    note_width, note_height = 100, 1200
-    text_img = Image.new("RGBA", (note_width, note_height), (0, 0, 0, 0))
-    text_draw = ImageDraw.Draw(text_img)
-
-    lines = text.split("\n")
-    total_height = sum(
-        text_draw.textbbox((0, 0), line, font=hand_font)[3] -
-        text_draw.textbbox((0, 0), line, font=hand_font)[1]
-        for line in lines
-    )
-    y_offset = (note_height - total_height) / 2
-
-    for line in lines:
-        bbox = text_draw.textbbox((0, 0), line, font=hand_font)
-        text_draw.text(((note_width - (bbox[2] - bbox[0])) / 2, y_offset), line, font=hand_font, fill=COLORS["black"])
-        y_offset += bbox[3] - bbox[1]
+        return f"Daniel\nom {days} \ndager"
+
+def render_daniel_note(hand_font: ImageFont.ImageFont, days: int | None) -> Layer | None:
+    """
+    The rotated Daniel note as a cached sprite. Its offset is relative to
+    where the note is placed.
+    """
+    text = get_daniel_note_text(days)
+    if text is None:
+        return None
+    return render_text_sprite(text, hand_font, NOTE_ANGLE, COLORS["black"], NOTE_CANVAS)
 
-    rotated = text_img.rotate(22, expand=1)
-    image.paste(rotated, (x, y), rotated)
+def draw_daniel_note(image: Image.Image, hand_font: ImageFont.ImageFont, x: int, y: int) -> None:
+    """Draw a vertical note about the next Daniel event."""
+    sprite = render_daniel_note(hand_font, next_daniel_day())
+    if sprite is not None:
+        dx, dy = sprite.offset
+        image.paste(sprite.image, (x + dx, y + dy), sprite.image)
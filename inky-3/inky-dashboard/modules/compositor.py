@@ -0,0 +1,99 @@
+"""
+Optional NumPy compositor for trimmed layers.
+Layers are converted once to premultiplied colour plus inverse alpha and a
+whole ordered stack is blended into a reusable 16-bit buffer, converting
+back to an RGB image only once at the end.
+"""
+
+from typing import NamedTuple
+from PIL import Image
+import weakref
+import threading
+from modules.layers import Layer
+
+try:
+    import numpy as np
+except ImportError:  # Scene falls back to Pillow pastes
+    np = None
+
+__all__ = ["PremultipliedLayer", "premultiply", "Compositor", "numpy_available"]
+
+def numpy_available() -> bool:
+    """True if the NumPy compositor can be used."""
+    return np is not None
+
+class PremultipliedLayer(NamedTuple):
+    colour: "np.ndarray"     # H x W x 3 uint16, colour * alpha / 255
+    inv_alpha: "np.ndarray"  # H x W x 3 uint16, (255 - alpha) scaled to 0..256
+    offset: tuple[int, int]
+
+# (id(image), kind) -> arrays; entries are dropped when the image is freed
+_ARRAYS = {}
+_ARRAYS_LOCK = threading.Lock()
+
+def premultiply(layer: Layer) -> PremultipliedLayer:
+    """Convert an RGBA layer to premultiplied arrays (cached per layer image)."""
+    def convert(image):
+        rgba = np.asarray(image.convert("RGBA"), dtype=np.uint16)
+        alpha = rgba[..., 3:4]
+        colour = (rgba[..., :3] * alpha + 127) // 255
+        # Scaling the inverse alpha to 256 turns the per-pixel division into a shift;
+        # it is stored per channel because broadcasting a single channel is much slower
+        inv_alpha = ((255 - alpha) * 256 + 127) // 255
+        return colour, np.repeat(inv_alpha, 3, axis=2)
+
+    colour, inv_alpha = _cached_arrays(layer.image, "premultiplied", convert)
+    return PremultipliedLayer(colour, inv_alpha, layer.offset)
+
+def _cached_arrays(image: Image.Image, kind: str, convert):
+    """convert(image), computed once per image object."""
+    key = (id(image), kind)
+    with _ARRAYS_LOCK:
+        arrays = _ARRAYS.get(key)
+    if arrays is None:
+        arrays = convert(image)
+        with _ARRAYS_LOCK:
+            _ARRAYS[key] = arrays
+        weakref.finalize(image, _forget, key)
+    return arrays
+
+def _forget(key) -> None:
+    with _ARRAYS_LOCK:
+        _ARRAYS.pop(key, None)
+
+class Compositor:
+    """Blends layer stacks into one reusable frame-sized buffer."""
+
+    def __init__(self, size):
+        width, height = size
+        self._buffer = np.empty((height, width, 3), dtype=np.uint16)
+
+    def compose(self, box, base: Image.Image | None, layers) -> Image.Image:
+        """
+        Composite `layers` (bottom to top, frame coordinates) over the `base`
+        image's pixels inside `box`. Returns an RGB image of the box.
+        """
+        x0, y0, x1, y1 = box
+        out = self._buffer[:y1 - y0, :x1 - x0]
+        if base is not None:
+            out[...] = _cached_arrays(base, "rgb", lambda image: np.asarray(image.convert("RGB")))[y0:y1, x0:x1]
+        else:
+            out[...] = 255
+
+        for layer in layers:
+            if not layer:
+                continue
+            lx0, ly0 = max(layer.offset[0], x0), max(layer.offset[1], y0)
+            lx1 = min(layer.offset[0] + layer.image.width, x1)
+            ly1 = min(layer.offset[1] + layer.image.height, y1)
+            if lx0 >= lx1 or ly0 >= ly1:
+                continue
+            arrays = premultiply(layer)
+            sx, sy = lx0 - layer.offset[0], ly0 - layer.offset[1]
+            sw, sh = lx1 - lx0, ly1 - ly0
+            dest = out[ly0 - y0:ly1 - y0, lx0 - x0:lx1 - x0]
+            dest *= arrays.inv_alpha[sy:sy + sh, sx:sx + sw]
+            dest >>= 8
+            dest += arrays.colour[sy:sy + sh, sx:sx + sw]
+
+        return Image.fromarray(out.astype(np.uint8))
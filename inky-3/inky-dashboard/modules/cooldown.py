@@ -3,9 +3,10 @@ Cooldown mode handler for the dashboard.
 Shows special screens during specific time periods.
 """
 
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 from PIL import Image
 from modules.calendar_data import next_daniel_day
+from modules.asset_cache import load_image
 import os
 
 __all__ = ["should_show_cooldown", "load_cooldown_image"]
@@ -19,6 +20,7 @@ from modules.audio_player import selected_backend
 
 __all__ = [
     "should_show_cooldown",
+    "next_cooldown_boundary",
     "load_cooldown_image",
     "play_cooldown_audio",
     "reset_cooldown_audio_state",
@@ -40,12 +42,14 @@ def is_time_between(start: time, end: time, now: time = None) -> bool:
         return now >= start or now < end
 
 
-def should_show_cooldown() -> str | None:
+def should_show_cooldown(now: datetime | None = None, events: dict | None = None) -> str | None:
     """Check if we should show a cooldown screen based on current time."""
-    now = datetime.now().time()
+    now = now or datetime.now()
+    today = now.date()
+    now = now.time()
 
     # Daniel scene only shown if it's a Daniel-day
-    if is_time_between(time(19, 0), time(20, 0), now) and next_daniel_day() == 0:
+    if is_time_between(time(19, 0), time(20, 0), now) and next_daniel_day(events, today) == 0:
         return "daniel"
     elif is_time_between(time(22, 0), time(23, 0), now):
         return "evening"
@@ -54,12 +58,26 @@ def should_show_cooldown() -> str | None:
     return None
 
 
+# Times of day at which should_show_cooldown() can change its answer
+COOLDOWN_BOUNDARIES = [time(5, 0), time(19, 0), time(20, 0), time(22, 0), time(23, 0)]
+
+
+def next_cooldown_boundary(now: datetime | None = None) -> datetime:
+    """The next time after `now` at which the cooldown screen may start or end."""
+    now = now or datetime.now()
+    candidates = []
+    for day_offset in (0, 1):
+        day = now.date() + timedelta(days=day_offset)
+        candidates.extend(datetime.combine(day, boundary) for boundary in COOLDOWN_BOUNDARIES)
+    return min(t for t in candidates if t > now)
+
+
 def load_cooldown_image(mode: str) -> Image.Image | None:
     """Load a cooldown image by mode name."""
     filename = f"{mode}.png"
     path = os.path.join("assets", "cooldown", filename)
     try:
-        return Image.open(path).convert("RGB")
+        return load_image(path, "RGB")
     except Exception:
         return None
 
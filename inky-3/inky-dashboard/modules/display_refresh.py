@@ -1,35 +1,86 @@
 """
-Flask web endpoint for triggering display refreshes.
-Provides a simple HTTP endpoint to force a display update.
+Flask web endpoints for display refreshes and frame history.
+Provides a simple HTTP endpoint to force a display update. The refresh is
+queued with the dashboard's refresh scheduler, so it never races the main
+loop for the panel. /history lists recently shown frames and why they were
+shown; each can be viewed as a PNG.
 """
 
-from flask import Flask
-from layout import build_display
-from modules.inky_loader import get_auto
+from flask import Flask, abort, jsonify, render_template_string, send_file
+from io import BytesIO
+from modules.refresh_scheduler import get_refresh_scheduler
+from modules.frame_history import get_frame_history
 import logging
+import sys
 
 app = Flask(__name__)
-display = get_auto()()
+
+HISTORY_HTML = """
+<!doctype html>
+<html lang="en">
+  <head>
+    <meta charset="utf-8" />
+    <title>Frame history</title>
+    <style>
+      body { font-family: system-ui, sans-serif; margin: 24px; }
+      td, th { padding: 4px 12px; text-align: left; }
+      img { max-width: 100%; border: 1px solid #ccc; }
+    </style>
+  </head>
+  <body>
+    <h1>Frame history</h1>
+    <p>{{ stats.frames }} frames ({{ stats.keyframes }} keyframes), {{ "%.1f"|format(stats.bytes / 1e6) }} MB</p>
+    <table>
+      <tr><th>#</th><th>Time</th><th>Causes</th><th>Stored as</th><th>Tiles</th><th>Bytes</th></tr>
+      {% for entry in entries %}
+      <tr>
+        <td><a href="/history/{{ entry.seq }}.png">{{ entry.seq }}</a></td>
+        <td>{{ entry.time }}</td>
+        <td>{{ entry.causes|join(", ") or "-" }}</td>
+        <td>{{ entry.kind }}</td>
+        <td>{{ entry.tiles }}</td>
+        <td>{{ entry.bytes }}</td>
+      </tr>
+      {% endfor %}
+    </table>
+    {% if entries %}<p><img src="/history/{{ entries[0].seq }}.png" alt="Latest frame" /></p>{% endif %}
+  </body>
+</html>
+"""
 
 @app.route("/refresh", methods=["POST"])
 def refresh():
     """Force a display refresh via HTTP POST."""
-    image = build_display()
-    if image:
-        image.save("simulated_output.png")
-        display.set_image(image)
-        display.show()
-        logging.info("Display refresh triggered")
-        return "OK", 200
-    else:
-        logging.error("Failed to build display image")
-        return "Error", 500
+    get_refresh_scheduler().note_cause("manual")
+    logging.info("Display refresh triggered")
+    return "OK", 200
+
+@app.route("/history")
+def history():
+    """Recently shown frames, newest first."""
+    entries = list(reversed(get_frame_history().entries()))
+    return render_template_string(HISTORY_HTML, entries=entries, stats=get_frame_history().stats)
+
+@app.route("/history.json")
+def history_json():
+    """Frame history metadata as JSON, oldest first."""
+    return jsonify(entries=get_frame_history().entries(), stats=get_frame_history().stats)
+
+@app.route("/history/<int:seq>.png")
+def history_frame(seq):
+    """A past frame rebuilt from the history."""
+    frame = get_frame_history().frame(seq)
+    if frame is None:
+        abort(404)
+    buffer = BytesIO()
+    frame.save(buffer, "PNG")
+    buffer.seek(0)
+    return send_file(buffer, mimetype="image/png")
 
 def run_flask():
     """Start the Flask server."""
     app.run(host="0.0.0.0", port=5050, debug=False)
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
-    logging.info("Starting display refresh server on port 5050")
-    run_flask()
+    logging.error("The refresh endpoint is now served by dashboard_main.py; run that instead")
+    sys.exit(1)
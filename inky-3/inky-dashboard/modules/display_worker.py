@@ -0,0 +1,80 @@
+"""
+Display driver worker for the Inky panel.
+Owns the display object and runs the slow set_image()/show() calls on its
+own thread, so rendering and button handling carry on while the panel
+refreshes. Frames are handed over through a single latest-wins slot.
+"""
+
+import threading
+import time
+import logging
+
+__all__ = ["DisplayWorker"]
+
+class DisplayWorker:
+    """Pushes frames to the panel one at a time; newer frames replace unsent ones."""
+
+    def __init__(self, display, on_shown=None):
+        self._display = display
+        self._on_shown = on_shown
+        self._cond = threading.Condition()
+        self._slot = None  # (frame_id, image)
+        self._busy = False
+        self.last_submitted_id = None
+        self.last_completed_id = None
+        self.stats = {"shown": 0, "superseded": 0, "failed": 0, "show_s": 0.0, "last_show_s": None}
+        self._thread = threading.Thread(target=self._run, name="display-worker", daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self) -> bool:
+        """True while the panel is refreshing or a frame is waiting to be sent."""
+        with self._cond:
+            return self._busy or self._slot is not None
+
+    def submit(self, image, frame_id) -> None:
+        """Queue a frame for the panel, replacing any frame that hasn't been sent yet."""
+        with self._cond:
+            if self._slot is not None:
+                self.stats["superseded"] += 1
+                logging.debug(f"Frame {self._slot[0]} superseded by {frame_id} before reaching the panel")
+            self._slot = (frame_id, image)
+            self.last_submitted_id = frame_id
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout=None) -> bool:
+        """Block until the panel has shown everything submitted. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._busy and self._slot is None, timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._slot is not None)
+                (frame_id, image), self._slot = self._slot, None
+                self._busy = True
+
+            start = time.perf_counter()
+            try:
+                self._display.set_image(image)
+                self._display.show()
+                ok = True
+            except Exception as e:
+                logging.error(f"Display update for frame {frame_id} failed: {e}")
+                ok = False
+            elapsed = time.perf_counter() - start
+
+            with self._cond:
+                self._busy = False
+                if ok:
+                    self.last_completed_id = frame_id
+                    self.stats["shown"] += 1
+                    self.stats["show_s"] += elapsed
+                    self.stats["last_show_s"] = round(elapsed, 2)
+                else:
+                    self.stats["failed"] += 1
+                self._cond.notify_all()
+            logging.debug(f"Frame {frame_id} on panel after {elapsed:.1f} s")
+
+            if self._on_shown:
+                self._on_shown(frame_id, ok)
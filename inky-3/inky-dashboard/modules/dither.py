@@ -0,0 +1,76 @@
+"""
+Dithering of photographic content onto the panel palette.
+"bayer" and "ign" (interleaved gradient noise, a cheap blue-noise
+substitute) are ordered modes done with one vectorized threshold offset and
+the palette lookup table; "diffusion" is Pillow's Floyd-Steinberg.
+"""
+
+from PIL import Image
+import threading
+import logging
+from modules.palette import get_palette, palette_image, pixels_to_panel
+from config import PANEL_PALETTE
+
+try:
+    import numpy as np
+except ImportError:  # only "diffusion" is available
+    np = None
+
+__all__ = ["DITHER_MODES", "dither_to_panel"]
+
+DITHER_MODES = ("bayer", "ign", "diffusion")
+# Peak-to-peak size of the ordered threshold offset in 8-bit levels; a full
+# step, as most panel colours sit at 0 or 255 in each channel
+ORDERED_SPREAD = 255
+
+# (mode, width, height) -> int16 offsets shaped (height, width, 1)
+_THRESHOLDS = {}
+_THRESHOLDS_LOCK = threading.Lock()
+
+def _bayer_matrix(order: int = 3):
+    """The 2**order square Bayer index matrix."""
+    matrix = np.zeros((1, 1), dtype=np.int32)
+    for _ in range(order):
+        matrix = np.block([[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]])
+    return matrix
+
+def _threshold_map(mode: str, width: int, height: int):
+    """Per-pixel offsets in [-ORDERED_SPREAD/2, ORDERED_SPREAD/2), built once per size."""
+    key = (mode, width, height)
+    with _THRESHOLDS_LOCK:
+        offsets = _THRESHOLDS.get(key)
+    if offsets is not None:
+        return offsets
+
+    if mode == "bayer":
+        matrix = _bayer_matrix()
+        n = matrix.shape[0]
+        tiled = np.tile(matrix, (height // n + 1, width // n + 1))[:height, :width]
+        thresholds = (tiled + 0.5) / matrix.size
+    else:
+        # Jimenez's interleaved gradient noise
+        y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+        thresholds = np.modf(52.9829189 * np.modf(0.06711056 * x + 0.00583715 * y)[0])[0]
+    offsets = ((thresholds - 0.5) * ORDERED_SPREAD).astype(np.int16)[..., None]
+    with _THRESHOLDS_LOCK:
+        _THRESHOLDS[key] = offsets
+    return offsets
+
+def dither_to_panel(image: Image.Image, mode: str = "bayer", name: str = PANEL_PALETTE) -> Image.Image:
+    """
+    Dither an image to the panel palette. Returns a "P" image indexed like
+    quantize_to_panel(). Ordered modes need NumPy and fall back to
+    "diffusion" without it.
+    """
+    if mode not in DITHER_MODES:
+        logging.warning(f"Unknown dither mode '{mode}', using bayer")
+        mode = "bayer"
+    rgb = image.convert("RGB") if image.mode != "RGB" else image
+
+    if mode == "diffusion" or np is None:
+        return rgb.quantize(palette=palette_image(get_palette(name)), dither=Image.Dither.FLOYDSTEINBERG)
+
+    pixels = np.asarray(rgb).astype(np.int16)
+    pixels += _threshold_map(mode, *rgb.size)
+    np.clip(pixels, 0, 255, out=pixels)
+    return pixels_to_panel(pixels.astype(np.uint8), name)
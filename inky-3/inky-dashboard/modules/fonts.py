@@ -0,0 +1,73 @@
+"""
+Shared font registry for the render modules.
+FreeType faces are loaded once per (path, size) and thread, since a face must
+not be used by two render threads at once; missing fonts are remembered so
+the fallback is resolved only once.
+"""
+
+from PIL import ImageFont
+import threading
+import logging
+
+__all__ = ["get_font", "font_key", "get_font_stats", "DEJAVU_BOLD_PATH"]
+
+DEJAVU_BOLD_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+
+# Per-thread (path, size) -> FreeTypeFont
+_LOCAL = threading.local()
+# (path, size) pairs that could not be loaded
+_FAILED = set()
+_LOCK = threading.Lock()
+_STATS = {"loaded": 0, "reused": 0, "failed": 0}
+
+def get_font(path: str, size: int, fallback=None):
+    """
+    Return the font at `path` in the given size, loading it on first use.
+    If it can't be loaded, `fallback` (or Pillow's default font) is returned.
+    """
+    key = (path, size)
+    faces = getattr(_LOCAL, "faces", None)
+    if faces is None:
+        faces = _LOCAL.faces = {}
+
+    font = faces.get(key)
+    with _LOCK:
+        if font is not None:
+            _STATS["reused"] += 1
+            return font
+        if key in _FAILED:
+            _STATS["reused"] += 1
+            return fallback if fallback is not None else _default_font()
+
+    try:
+        font = ImageFont.truetype(path, size)
+    except Exception as e:
+        logging.warning(f"Could not load font {path} ({size}px): {e}")
+        with _LOCK:
+            _FAILED.add(key)
+            _STATS["failed"] += 1
+        return fallback if fallback is not None else _default_font()
+
+    faces[key] = font
+    with _LOCK:
+        _STATS["loaded"] += 1
+    return font
+
+def _default_font():
+    """Pillow's built-in font, loaded once per thread."""
+    font = getattr(_LOCAL, "default", None)
+    if font is None:
+        font = _LOCAL.default = ImageFont.load_default()
+    return font
+
+def font_key(font) -> tuple:
+    """A key identifying a font across threads, for caching measurements and renders."""
+    path = getattr(font, "path", None)
+    if path is None:
+        return ("id", id(font))
+    return (path, font.size)
+
+def get_font_stats() -> dict:
+    """Return how often faces were loaded vs reused."""
+    with _LOCK:
+        return dict(_STATS)
@@ -0,0 +1,174 @@
+"""
+On-disk cache of finished frames.
+Frames are stored as raw PPM (RGB) and PGM (panel palette indices) files
+keyed by scene fingerprint, so a scene that comes back (a cooldown image, a
+replayed track) is read back instead of rendered. The fingerprint of the
+frame on the panel is saved too, so a restart can tell the panel is current.
+"""
+
+from PIL import Image
+import hashlib
+import json
+import os
+import queue
+import threading
+import logging
+from modules.atomic_io import write_atomic
+from modules.asset_bundle import asset_signature
+from modules.palette import PANEL_PALETTE, panel_image_from_indices
+from config import FRAME_CACHE_DIR, FRAME_CACHE_MB, DITHER_MODE, LAYOUT_FILE
+
+__all__ = ["FrameCache", "get_frame_cache"]
+
+# Bump when the stored format or rendering changes so old frames are ignored
+FRAME_CACHE_VERSION = 1
+PANEL_STATE_FILE = "panel_state.json"
+# Frames waiting to be written; more than this are dropped rather than queued
+MAX_PENDING_WRITES = 4
+
+def _file_digest(path: str) -> str:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return ""
+
+class FrameCache:
+    """
+    Size-bounded LRU of rendered frames in `directory`.
+    Entries are keyed by scene fingerprint salted with the assets, layout,
+    panel palette and dither mode, so changed assets never serve stale frames.
+    Writes happen on a background thread.
+    """
+
+    def __init__(self, directory: str = FRAME_CACHE_DIR, budget_mb: int = FRAME_CACHE_MB):
+        self.directory = directory
+        self.budget = budget_mb * 1024 * 1024
+        self._salt = f"{FRAME_CACHE_VERSION}:{PANEL_PALETTE}:{DITHER_MODE}:{asset_signature()}:{_file_digest(LAYOUT_FILE)}"
+        self._queue = queue.Queue(maxsize=MAX_PENDING_WRITES)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "dropped": 0, "evictions": 0}
+
+    def _key(self, fingerprint: str) -> str:
+        return hashlib.sha1(f"{self._salt}:{fingerprint}".encode()).hexdigest()
+
+    def _paths(self, fingerprint: str) -> tuple[str, str]:
+        base = os.path.join(self.directory, self._key(fingerprint))
+        return base + ".ppm", base + ".pgm"
+
+    def get(self, fingerprint: str):
+        """(image, panel_frame) stored for a fingerprint, or None."""
+        image_path, panel_path = self._paths(fingerprint)
+        try:
+            with Image.open(image_path) as f:
+                image = f.convert("RGB") if f.mode != "RGB" else f.copy()
+            with Image.open(panel_path) as f:
+                panel_frame = panel_image_from_indices(f)
+            os.utime(image_path)  # mark as recently used
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None
+        except Exception as e:
+            logging.warning(f"Dropping unreadable cached frame {image_path}: {e}")
+            self._remove(image_path, panel_path)
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return image, panel_frame
+
+    def put(self, fingerprint: str, image: Image.Image, panel_frame: Image.Image) -> None:
+        """Queue a frame for storing; it is written in the background."""
+        if os.path.exists(self._paths(fingerprint)[0]):
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((fingerprint, image, panel_frame))
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def flush(self) -> None:
+        """Block until queued frames are written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="frame-cache", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            fingerprint, image, panel_frame = self._queue.get()
+            try:
+                self._write(fingerprint, image, panel_frame)
+                self.stats["stored"] += 1
+                self._prune()
+            except Exception as e:
+                logging.warning(f"Could not cache frame: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, fingerprint: str, image: Image.Image, panel_frame: Image.Image) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        image_path, panel_path = self._paths(fingerprint)
+        # Indices first: a frame only counts as cached once its PPM exists
+        indices = Image.frombytes("L", panel_frame.size, panel_frame.tobytes())
+        write_atomic(panel_path, lambda f: indices.save(f, format="PPM"))
+        rgb = image.convert("RGB") if image.mode != "RGB" else image
+        write_atomic(image_path, lambda f: rgb.save(f, format="PPM"))
+
+    def _remove(self, *paths: str) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _prune(self) -> None:
+        """Remove least recently used frames until the cache fits its budget."""
+        frames = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                name, ext = os.path.splitext(entry.name)
+                if entry.is_file() and ext in (".ppm", ".pgm"):
+                    stat = entry.stat()
+                    mtime, size = frames.get(name, (0, 0))
+                    frames[name] = (max(mtime, stat.st_mtime) if ext == ".ppm" else mtime, size + stat.st_size)
+        total = sum(size for _, size in frames.values())
+        for name, (_, size) in sorted(frames.items(), key=lambda item: item[1][0]):
+            if total <= self.budget:
+                break
+            base = os.path.join(self.directory, name)
+            self._remove(base + ".ppm", base + ".pgm")
+            total -= size
+            self.stats["evictions"] += 1
+
+    def save_panel_state(self, fingerprint: str) -> None:
+        """Record which frame the panel now shows."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            write_atomic(os.path.join(self.directory, PANEL_STATE_FILE),
+                         lambda f: json.dump({"fingerprint": fingerprint}, f), text=True)
+        except Exception as e:
+            logging.warning(f"Could not save panel state: {e}")
+
+    def panel_frame_on_display(self):
+        """(fingerprint, image, panel_frame) of the frame last shown, if it is still cached."""
+        try:
+            with open(os.path.join(self.directory, PANEL_STATE_FILE)) as f:
+                fingerprint = json.load(f)["fingerprint"]
+        except (OSError, ValueError, KeyError):
+            return None
+        cached = self.get(fingerprint)
+        return (fingerprint, *cached) if cached else None
+
+_frame_cache = None
+
+def get_frame_cache():
+    """The shared FrameCache."""
+    global _frame_cache
+    if _frame_cache is None:
+        _frame_cache = FrameCache()
+    return _frame_cache
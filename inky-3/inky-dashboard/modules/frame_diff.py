@@ -0,0 +1,143 @@
+"""
+In-memory frame comparison for deciding when the panel needs a refresh.
+Keeps per-tile hashes of the last displayed frame so a new frame can be
+checked with one hashing pass, without reading anything back from disk.
+"""
+
+from typing import NamedTuple
+from PIL import Image, ImageChops
+import hashlib
+from modules.layers import intersect_box
+
+__all__ = ["FrameDiff", "FrameComparator", "DIFF_GRID"]
+
+# Columns x rows the frame is split into (100x100 px tiles on the 1600x1200 panel)
+DIFF_GRID = (16, 12)
+
+class FrameDiff(NamedTuple):
+    changed_tiles: frozenset    # {(col, row), ...}
+    bbox: tuple | None          # (left, top, right, bottom) of changed pixels
+    changed_fraction: float     # share of frame pixels that differ
+    hashes: tuple               # tile hashes of the compared frame
+    key: object = None          # compare() key the frame was hashed under
+
+    def __bool__(self):
+        return bool(self.changed_tiles)
+
+def _tile_boxes(size, grid):
+    """Split a frame into grid tiles; edge tiles absorb any remainder."""
+    width, height = size
+    cols, rows = grid
+    xs = [width * c // cols for c in range(cols + 1)]
+    ys = [height * r // rows for r in range(rows + 1)]
+    return [
+        ((c, r), (xs[c], ys[r], xs[c + 1], ys[r + 1]))
+        for r in range(rows) for c in range(cols)
+    ]
+
+def _count_changed(new_tile, old_tile):
+    """Return (changed pixel count, bbox) for two equally sized tiles."""
+    diff = ImageChops.difference(new_tile, old_tile)
+    bands = diff.split()
+    mask = bands[0]
+    for band in bands[1:]:
+        mask = ImageChops.lighter(mask, band)
+    unchanged = mask.histogram()[0]
+    return new_tile.width * new_tile.height - unchanged, mask.getbbox()
+
+class FrameComparator:
+    """Compares frames against the last one remembered as being on the panel."""
+
+    def __init__(self, grid=DIFF_GRID):
+        self.grid = grid
+        self._boxes = None
+        self._box_size = None
+        self._size = None
+        self._mode = None
+        self._hashes = None
+        self._previous = None
+        self._key = None
+        self._live = {}  # regions -> tile indices touching them
+
+    def tiles(self, size) -> list:
+        """[((col, row), box), ...] for a frame of the given size."""
+        if self._box_size != size:
+            self._boxes = _tile_boxes(size, self.grid)
+            self._box_size = size
+        return self._boxes
+
+    def hash_tiles(self, image: Image.Image) -> tuple:
+        """Hash every tile of a frame."""
+        return tuple(
+            hashlib.blake2b(image.crop(box).tobytes(), digest_size=16).digest()
+            for _, box in self.tiles(image.size)
+        )
+
+    def _live_tiles(self, size, regions) -> frozenset:
+        """Indices of the tiles that overlap any of `regions`."""
+        live = self._live.get((size, regions))
+        if live is None:
+            live = frozenset(
+                i for i, (_, box) in enumerate(self.tiles(size))
+                if any(intersect_box(box, region) for region in regions)
+            )
+            self._live[(size, regions)] = live
+        return live
+
+    def compare(self, image: Image.Image, key=None, regions=None) -> FrameDiff:
+        """
+        Compare a frame with the remembered one. Everything counts as changed if there is none.
+        If `key` is given and matches the remembered frame's, the frames are
+        known to differ only inside `regions`: only tiles there are hashed.
+        """
+        boxes = self.tiles(image.size)
+        if self._hashes is None or self._size != image.size or self._mode != image.mode:
+            tiles = frozenset(cell for cell, _ in boxes)
+            return FrameDiff(tiles, (0, 0) + image.size, 1.0, self.hash_tiles(image), key)
+        if key is not None and key == self._key and regions:
+            live = self._live_tiles(image.size, tuple(regions))
+            hashes = tuple(
+                hashlib.blake2b(image.crop(box).tobytes(), digest_size=16).digest() if i in live else old
+                for i, ((_, box), old) in enumerate(zip(boxes, self._hashes))
+            )
+        else:
+            hashes = self.hash_tiles(image)
+
+        changed = frozenset(
+            cell for (cell, _), new, old in zip(boxes, hashes, self._hashes) if new != old
+        )
+        if not changed:
+            return FrameDiff(changed, None, 0.0, hashes, key)
+
+        changed_pixels = 0
+        bbox = None
+        for cell, box in boxes:
+            if cell not in changed:
+                continue
+            count, tile_bbox = _count_changed(image.crop(box), self._previous.crop(box))
+            changed_pixels += count
+            if tile_bbox:
+                x, y = box[:2]
+                tile_bbox = (x + tile_bbox[0], y + tile_bbox[1], x + tile_bbox[2], y + tile_bbox[3])
+                bbox = tile_bbox if bbox is None else (
+                    min(bbox[0], tile_bbox[0]), min(bbox[1], tile_bbox[1]),
+                    max(bbox[2], tile_bbox[2]), max(bbox[3], tile_bbox[3]),
+                )
+        fraction = changed_pixels / (image.width * image.height)
+        return FrameDiff(changed, bbox, fraction, hashes, key)
+
+    def forget(self) -> None:
+        """Drop the remembered frame, so the next one counts as entirely changed."""
+        self._hashes = None
+        self._size = None
+        self._mode = None
+        self._previous = None
+        self._key = None
+
+    def remember(self, image: Image.Image, diff: FrameDiff | None = None) -> None:
+        """Record a frame as the one now on the panel, under the key it was compared with."""
+        self._hashes = diff.hashes if diff is not None else self.hash_tiles(image)
+        self._key = diff.key if diff is not None else None
+        self._size = image.size
+        self._mode = image.mode
+        self._previous = image
@@ -0,0 +1,189 @@
+"""
+History of the frames shown on the panel.
+Panel-palette frames are kept as a ring of zlib-compressed entries: a full
+keyframe every HISTORY_KEYFRAME_EVERY frames and, in between, only the
+tiles that changed. Entries are mirrored to disk so history survives a
+restart, and any past frame can be rebuilt along with why it was shown.
+"""
+
+from datetime import datetime
+from PIL import Image
+import json
+import os
+import threading
+import zlib
+import logging
+from modules.atomic_io import write_bytes_atomic
+from modules.frame_diff import FrameComparator
+from modules.palette import PANEL_PALETTE, panel_image_from_indices
+from config import HISTORY_DIR, HISTORY_FRAMES, HISTORY_KEYFRAME_EVERY
+
+__all__ = ["FrameHistory", "get_frame_history"]
+
+INDEX_FILE = "index.json"
+HISTORY_VERSION = 1
+COMPRESS_LEVEL = 6
+
+class FrameHistory:
+    """
+    Ring buffer of the last `max_frames` panel frames.
+    Each entry is a dict of metadata (seq, time, causes, kind, tiles...) and
+    its compressed data; a "delta" entry holds the changed tiles relative to
+    the entry before it. The oldest entry is always a keyframe.
+    """
+
+    def __init__(self, directory: str = HISTORY_DIR, max_frames: int = HISTORY_FRAMES,
+                 keyframe_every: int = HISTORY_KEYFRAME_EVERY):
+        self.directory = directory
+        self.max_frames = max_frames
+        self.keyframe_every = max(1, keyframe_every)
+        self._entries = []  # [(meta, data)], oldest first
+        self._comparator = FrameComparator()
+        self._since_keyframe = 0
+        self._next_seq = 1
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _data_path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{seq}.bin")
+
+    def _ensure_loaded(self) -> None:
+        """Restore history written by a previous run, on first use."""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE)) as f:
+                index = json.load(f)
+            if index.get("version") != HISTORY_VERSION:
+                return
+            entries = []
+            for meta in index["entries"]:
+                with open(self._data_path(meta["seq"]), "rb") as f:
+                    entries.append((meta, f.read()))
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logging.warning(f"Could not restore frame history: {e}")
+            return
+        if not entries or entries[0][0]["kind"] != "key":
+            return
+        self._entries = entries
+        self._next_seq = entries[-1][0]["seq"] + 1
+        self._since_keyframe = len(entries) - max(i for i, (meta, _) in enumerate(entries) if meta["kind"] == "key") - 1
+        self._comparator.remember(self._rebuild(len(entries) - 1))
+
+    def _save_index(self) -> None:
+        index = {"version": HISTORY_VERSION, "entries": [meta for meta, _ in self._entries]}
+        write_bytes_atomic(os.path.join(self.directory, INDEX_FILE), json.dumps(index).encode())
+
+    def record(self, panel_frame: Image.Image, causes=(), frame_id=None, fingerprint=None) -> dict:
+        """Add a frame shown on the panel; returns its metadata."""
+        with self._lock:
+            self._ensure_loaded()
+            diff = self._comparator.compare(panel_frame)
+            is_key = not self._entries or self._since_keyframe + 1 >= self.keyframe_every \
+                or self._entries[-1][0]["size"] != list(panel_frame.size)
+            meta = {
+                "seq": self._next_seq,
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "causes": sorted(causes),
+                "frame_id": frame_id,
+                "fingerprint": fingerprint,
+                "size": list(panel_frame.size),
+                "palette": PANEL_PALETTE,
+            }
+            if is_key:
+                data = zlib.compress(panel_frame.tobytes(), COMPRESS_LEVEL)
+                meta.update(kind="key", tiles=len(self._comparator.tiles(panel_frame.size)))
+                self._since_keyframe = 0
+            else:
+                cells = sorted(diff.changed_tiles)
+                boxes = dict(self._comparator.tiles(panel_frame.size))
+                data = zlib.compress(b"".join(panel_frame.crop(boxes[cell]).tobytes() for cell in cells), COMPRESS_LEVEL)
+                meta.update(kind="delta", tiles=len(cells), cells=[list(cell) for cell in cells])
+                self._since_keyframe += 1
+            meta["bytes"] = len(data)
+            self._comparator.remember(panel_frame, diff)
+            self._next_seq += 1
+            self._entries.append((meta, data))
+
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                write_bytes_atomic(self._data_path(meta["seq"]), data)
+                while len(self._entries) > self.max_frames:
+                    self._drop_oldest()
+                self._save_index()
+            except Exception as e:
+                logging.warning(f"Could not write frame history: {e}")
+            return meta
+
+    def _drop_oldest(self) -> None:
+        """Remove the oldest entry, turning the next one into a keyframe if needed."""
+        if self._entries[1][0]["kind"] == "delta":
+            frame = self._rebuild(1)
+            meta = dict(self._entries[1][0], kind="key", tiles=len(self._comparator.tiles(frame.size)))
+            meta.pop("cells", None)
+            data = zlib.compress(frame.tobytes(), COMPRESS_LEVEL)
+            meta["bytes"] = len(data)
+            self._entries[1] = (meta, data)
+            write_bytes_atomic(self._data_path(meta["seq"]), data)
+        old_meta, _ = self._entries.pop(0)
+        try:
+            os.remove(self._data_path(old_meta["seq"]))
+        except OSError:
+            pass
+
+    def _rebuild(self, position: int) -> Image.Image:
+        """Reconstruct the frame at an index into _entries."""
+        key = max(i for i in range(position + 1) if self._entries[i][0]["kind"] == "key")
+        meta, data = self._entries[key]
+        size = tuple(meta["size"])
+        frame = Image.frombytes("L", size, zlib.decompress(data))
+        boxes = dict(self._comparator.tiles(size))
+        for meta, data in self._entries[key + 1:position + 1]:
+            tiles = zlib.decompress(data)
+            start = 0
+            for cell in meta["cells"]:
+                box = boxes[tuple(cell)]
+                tile_size = (box[2] - box[0], box[3] - box[1])
+                length = tile_size[0] * tile_size[1]
+                frame.paste(Image.frombytes("L", tile_size, tiles[start:start + length]), box[:2])
+                start += length
+        return panel_image_from_indices(frame, meta["palette"])
+
+    def entries(self) -> list[dict]:
+        """Metadata of every stored frame, oldest first."""
+        with self._lock:
+            self._ensure_loaded()
+            return [dict(meta) for meta, _ in self._entries]
+
+    def frame(self, seq: int) -> Image.Image | None:
+        """The panel frame of a history entry, or None if it has dropped out."""
+        with self._lock:
+            self._ensure_loaded()
+            for position, (meta, _) in enumerate(self._entries):
+                if meta["seq"] == seq:
+                    return self._rebuild(position)
+        return None
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            self._ensure_loaded()
+            return {
+                "frames": len(self._entries),
+                "keyframes": sum(1 for meta, _ in self._entries if meta["kind"] == "key"),
+                "bytes": sum(meta["bytes"] for meta, _ in self._entries),
+            }
+
+_frame_history = None
+_history_lock = threading.Lock()
+
+def get_frame_history():
+    """The shared FrameHistory."""
+    global _frame_history
+    with _history_lock:
+        if _frame_history is None:
+            _frame_history = FrameHistory()
+    return _frame_history
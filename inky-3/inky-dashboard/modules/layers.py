@@ -0,0 +1,74 @@
+"""
+Trimmed overlay layers for the dashboard.
+Most overlay PNGs are full-frame and mostly transparent; a Layer keeps only
+the visible bounding box plus where it sits on the frame.
+"""
+
+from typing import NamedTuple
+from PIL import Image
+from modules.asset_cache import load_cached
+from modules.asset_bundle import bundle_lookup
+
+class Layer(NamedTuple):
+    image: Image.Image
+    offset: tuple[int, int]
+
+    @property
+    def box(self) -> tuple[int, int, int, int]:
+        """Frame coordinates covered by this layer as (left, top, right, bottom)."""
+        x, y = self.offset
+        return (x, y, x + self.image.width, y + self.image.height)
+
+def trim_layer(image: Image.Image, offset: tuple[int, int] = (0, 0)) -> Layer | None:
+    """Crop an RGBA image to its non-transparent pixels. Returns None if fully transparent."""
+    bbox = image.getchannel("A").getbbox()
+    if bbox is None:
+        return None
+    if bbox == (0, 0, image.width, image.height):
+        return Layer(image, offset)
+    return Layer(image.crop(bbox), (offset[0] + bbox[0], offset[1] + bbox[1]))
+
+def _layer_bytes(layer: Layer | None) -> int:
+    return layer.image.width * layer.image.height * 4 if layer else 0
+
+def decode_layer(path: str) -> Layer | None:
+    """Decode an overlay PNG into a trimmed RGBA layer."""
+    with Image.open(path) as raw:
+        return trim_layer(raw.convert("RGBA"))
+
+def load_layer(path: str) -> Layer | None:
+    """Load an overlay PNG as a trimmed, cached RGBA layer (from the asset bundle if compiled)."""
+    def decode(abs_path):
+        found = bundle_lookup(abs_path, ("layer",))
+        if found is not None:
+            image, offset = found
+            return Layer(image, offset) if image is not None else None
+        return decode_layer(abs_path)
+
+    return load_cached(path, ("layer",), decode, _layer_bytes)
+
+def paste_layer(image: Image.Image, layer: Layer | None) -> None:
+    """Alpha-paste a layer onto an image, touching only the layer's region."""
+    if layer:
+        image.paste(layer.image, layer.offset, layer.image)
+
+def intersect_box(a, b) -> tuple[int, int, int, int] | None:
+    """Overlap of two (left, top, right, bottom) boxes, or None if they don't overlap."""
+    box = (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+    return box if box[0] < box[2] and box[1] < box[3] else None
+
+def bounding_box(boxes) -> tuple[int, int, int, int] | None:
+    """Smallest box covering all given boxes, or None if there are none."""
+    boxes = list(boxes)
+    if not boxes:
+        return None
+    return (
+        min(b[0] for b in boxes), min(b[1] for b in boxes),
+        max(b[2] for b in boxes), max(b[3] for b in boxes),
+    )
+
+def union_box(layers) -> tuple[int, int, int, int] | None:
+    """Bounding box covering all given layers, or None if there are none."""
+    return bounding_box(layer.box for layer in layers if layer)
+
+__all__ = ["Layer", "trim_layer", "decode_layer", "load_layer", "paste_layer", "union_box", "intersect_box", "bounding_box"]
@@ -0,0 +1,110 @@
+"""
+Declarative layout for the main dashboard.
+layout.json lists the widgets bottom to top with their regions and data
+sources. compile_layout() turns it into a RenderPlan once at start-up:
+static image layers are flattened into the background wherever nothing
+dynamic sits under them, and the regions that can ever change are known.
+"""
+
+import json
+import logging
+from modules.layers import bounding_box, intersect_box, load_layer
+from modules.scene import Scene, Widget
+
+__all__ = ["LayoutError", "RenderPlan", "load_layout_spec", "compile_layout", "STATIC_SOURCE"]
+
+# Source of widgets that draw a fixed image file ("path"); these can be flattened
+STATIC_SOURCE = "layer"
+# Source of the opaque first widget, which receives the flattened layers as "overlays"
+BACKGROUND_SOURCE = "background"
+
+class LayoutError(ValueError):
+    """A layout description that can't be compiled."""
+
+def _region(widget: dict, size) -> tuple:
+    region = widget.get("region", "full")
+    if region == "full":
+        return (0, 0) + tuple(size)
+    if not (isinstance(region, list) and len(region) == 4 and all(isinstance(v, int) for v in region)):
+        raise LayoutError(f"Widget '{widget.get('name')}' needs a region of [left, top, right, bottom] or \"full\"")
+    return tuple(region)
+
+class RenderPlan:
+    """
+    A compiled layout: widget definitions bottom to top, the regions the
+    dynamic widgets above the background draw into (nothing else changes
+    unless the background does) and the static layers merged into it.
+    scene() builds a Scene with its own retained widget state.
+    """
+
+    def __init__(self, size, widgets, dynamic_regions, flattened):
+        self.size = size
+        self.widgets = widgets  # (name, region, fingerprint, render, cause)
+        self.dynamic_regions = dynamic_regions
+        self.flattened = flattened
+
+    def background_fingerprint(self, inputs):
+        """Fingerprint of the background; frames with equal ones differ only inside dynamic_regions."""
+        return self.widgets[0][2](inputs)
+
+    def scene(self, engine: str = "pillow", workers: int = 1) -> Scene:
+        return Scene(self.size, [Widget(*widget) for widget in self.widgets], engine=engine, workers=workers)
+
+def load_layout_spec(path: str) -> dict:
+    """Read a layout description from a JSON file."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise LayoutError(f"Could not read layout {path}: {e}") from e
+
+def compile_layout(spec: dict, sources: dict) -> RenderPlan:
+    """
+    Compile a layout description. `sources` maps each source name to
+    factory(widget_spec) -> (fingerprint(inputs), render(inputs)), the data
+    binding for widgets using it (see modules.scene.Widget). Factories get
+    the widget's entry with "region" resolved to a box.
+    """
+    size = tuple(spec.get("size", ()))
+    widgets = spec.get("widgets") or []
+    if len(size) != 2:
+        raise LayoutError("Layout needs a size of [width, height]")
+    if not widgets or widgets[0].get("source") != BACKGROUND_SOURCE:
+        raise LayoutError(f"The first widget must use the '{BACKGROUND_SOURCE}' source")
+    names = [widget.get("name") for widget in widgets]
+    if None in names or len(set(names)) != len(names):
+        raise LayoutError("Every widget needs a unique name")
+
+    compiled, overlays, flattened = [], [], []
+    # Regions drawn by widgets that stay in the plan, which static layers above can't be merged under
+    covered, dynamic_regions = [], []
+    for widget in widgets[1:]:
+        name, source, region = widget["name"], widget.get("source"), _region(widget, size)
+        if source == STATIC_SOURCE:
+            path = widget.get("path")
+            if not path:
+                raise LayoutError(f"Widget '{name}' needs a path")
+            keep_out = bounding_box(box for box in (intersect_box(region, other) for other in covered) if box)
+            if keep_out != region:
+                overlays.append((path, keep_out))
+                flattened.append(name)
+                if keep_out is None:
+                    continue
+                # Only the part over dynamic widgets is still drawn on top of them
+                region = keep_out
+            compiled.append((name, region, lambda inputs: None, lambda inputs, path=path: load_layer(path), widget.get("cause")))
+        else:
+            factory = sources.get(source)
+            if factory is None:
+                raise LayoutError(f"Widget '{name}' uses unknown source '{source}'")
+            fingerprint, render = factory(dict(widget, region=region))
+            compiled.append((name, region, fingerprint, render, widget.get("cause")))
+            dynamic_regions.append(region)
+        covered.append(region)
+
+    background = dict(widgets[0], region=_region(widgets[0], size), overlays=overlays)
+    fingerprint, render = sources[BACKGROUND_SOURCE](background)
+    compiled.insert(0, (background["name"], background["region"], fingerprint, render, background.get("cause")))
+
+    logging.info(f"Compiled layout: {len(compiled)} widgets, flattened into the background: {', '.join(flattened) or 'none'}")
+    return RenderPlan(size, compiled, tuple(dynamic_regions), flattened)
@@ -0,0 +1,97 @@
+"""
+Mapping of frames onto the e-paper panel's colour set.
+Frames are reduced to palette indices through a precomputed RGB lookup
+table, so change detection only sees differences the panel can show.
+"""
+
+from PIL import Image
+import logging
+from config import PANEL_PALETTE
+
+try:
+    import numpy as np
+except ImportError:  # Pillow's quantizer is used instead
+    np = None
+
+__all__ = ["PANEL_PALETTES", "get_palette", "quantize_to_panel", "pixels_to_panel", "panel_image_from_indices", "palette_image"]
+
+# Panel colours in the index order the Inky drivers use for "P" images
+PANEL_PALETTES = {
+    # 13.3" Inky Impression (Spectra 6)
+    "spectra6": [
+        (0, 0, 0), (255, 255, 255), (255, 255, 0), (255, 0, 0), (0, 0, 255), (0, 255, 0),
+    ],
+    # 7-colour Inky Impression panels
+    "7colour": [
+        (0, 0, 0), (255, 255, 255), (0, 255, 0), (0, 0, 255), (255, 0, 0), (255, 255, 0), (255, 140, 0),
+    ],
+}
+
+# Bits kept per channel when indexing the lookup table (64 levels -> 256 KiB table)
+LUT_BITS = 6
+
+_LUT_CACHE = {}
+
+def get_palette(name: str = PANEL_PALETTE) -> list[tuple[int, int, int]]:
+    """Return the colours of a panel palette, falling back to Spectra 6."""
+    if name not in PANEL_PALETTES:
+        logging.warning(f"Unknown panel palette '{name}', using spectra6")
+        name = "spectra6"
+    return PANEL_PALETTES[name]
+
+def palette_image(palette) -> Image.Image:
+    """A 1x1 "P" image carrying the palette, as Pillow's quantizer expects."""
+    image = Image.new("P", (1, 1))
+    flat = [c for colour in palette for c in colour]
+    image.putpalette(flat + flat[:3] * (256 - len(palette)))
+    return image
+
+def _build_lut(palette):
+    """Nearest palette index for every RGB value at LUT_BITS precision."""
+    levels = 1 << LUT_BITS
+    step = 256 // levels
+    centres = np.arange(levels, dtype=np.int32) * step + step // 2
+    r, g, b = np.meshgrid(centres, centres, centres, indexing="ij")
+    rgb = np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1)
+    colours = np.array(palette, dtype=np.int32)
+    distances = ((rgb[:, None, :] - colours[None, :, :]) ** 2).sum(axis=2)
+    return distances.argmin(axis=1).astype(np.uint8)
+
+def _get_lut(name):
+    lut = _LUT_CACHE.get(name)
+    if lut is None:
+        lut = _LUT_CACHE[name] = _build_lut(get_palette(name))
+    return lut
+
+def quantize_to_panel(image: Image.Image, name: str = PANEL_PALETTE) -> Image.Image:
+    """
+    Map an image to the nearest panel colours (no dithering).
+    Returns a "P" image whose indices follow PANEL_PALETTES[name]; images
+    already in "P" mode are assumed to be panel-indexed and returned as-is.
+    """
+    if image.mode == "P":
+        return image
+    palette = get_palette(name)
+    rgb = image.convert("RGB") if image.mode != "RGB" else image
+
+    if np is None:
+        return rgb.quantize(palette=palette_image(palette), dither=Image.Dither.NONE)
+
+    return pixels_to_panel(np.asarray(rgb), name)
+
+def pixels_to_panel(pixels, name: str = PANEL_PALETTE) -> Image.Image:
+    """Nearest-colour "P" image for an (height, width, 3) uint8 array (needs NumPy)."""
+    shift = 8 - LUT_BITS
+    pixels = pixels >> shift
+    index = (pixels[..., 0].astype(np.uint32) << (2 * LUT_BITS)) \
+        | (pixels[..., 1].astype(np.uint32) << LUT_BITS) | pixels[..., 2]
+    height, width = index.shape
+    quantized = Image.frombytes("P", (width, height), _get_lut(name)[index].tobytes())
+    quantized.putpalette(palette_image(get_palette(name)).getpalette())
+    return quantized
+
+def panel_image_from_indices(indices: Image.Image, name: str = PANEL_PALETTE) -> Image.Image:
+    """Turn an "L" image of palette indices (e.g. a stored panel frame) back into a panel "P" image."""
+    panel = Image.frombytes("P", indices.size, indices.tobytes())
+    panel.putpalette(palette_image(get_palette(name)).getpalette())
+    return panel
@@ -0,0 +1,132 @@
+"""
+Speculative pre-rendering of predictable screen changes.
+Cooldown windows, appliance status levels and the date roll over at known
+times, and a playing track ends when its duration is up. The frame for the
+next such moment (or the next queued track) is rendered during idle ticks
+and swapped in when the moment arrives, so the panel refresh starts on time.
+"""
+
+from datetime import datetime, timedelta
+from typing import NamedTuple
+import time
+import logging
+from modules.appliances import get_appliance_state, next_status_change
+from modules.cooldown import next_cooldown_boundary
+from modules.spotify_connect import get_next_track
+from modules.palette import quantize_to_panel
+from config import PRERENDER_LEAD, NEXT_TRACK_LEAD
+
+__all__ = ["next_transition", "track_seconds_left", "Prerenderer", "PreparedFrame"]
+
+# Seconds before the queue is looked up again when it had no next track (or failed)
+NEXT_TRACK_RETRY = 5
+
+def next_transition(now: datetime, appliances: list[dict]) -> datetime:
+    """The next time after `now` at which the local views can change by themselves."""
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    candidates = [midnight, next_cooldown_boundary(now)]
+    appliance_change = next_status_change(appliances or [], now)
+    if appliance_change:
+        candidates.append(appliance_change)
+    return min(candidates)
+
+def track_seconds_left(track: dict) -> float:
+    """Seconds of the track left to play when its playback state was fetched."""
+    return max(0.0, (track.get("duration_ms", 0) - track.get("progress_ms", 0)) / 1000)
+
+class PreparedFrame(NamedTuple):
+    at: datetime
+    fingerprint: str
+    image: object        # RGB frame, or None if nothing changes at `at`
+    panel_frame: object  # image quantized to the panel palette
+
+class Prerenderer:
+    """
+    Keeps at most one frame rendered ahead for the next transition.
+    collect(now) returns scene inputs for a time, fingerprint(inputs) their
+    digest, render(inputs) the frame and panel_frame(inputs, image) its
+    panel-colour version (see layout).
+    """
+
+    def __init__(self, collect, fingerprint, render, panel_frame=None, lead: float = PRERENDER_LEAD):
+        self._collect = collect
+        self._fingerprint = fingerprint
+        self._render = render
+        self._panel_frame = panel_frame or (lambda inputs, image: quantize_to_panel(image) if image else None)
+        self.lead = lead
+        self._prepared = None
+        # Track id whose successor was already prepared, and when an empty lookup may be retried
+        self._next_track_for = None
+        self._next_track_retry_at = 0.0
+        self.stats = {"prepared": 0, "used": 0, "wasted": 0}
+
+    def next_transition(self, now: datetime, appliances=None) -> datetime:
+        """
+        next_transition() for the tick's appliance state, or the stored one
+        read without writing it back (this runs every tick).
+        """
+        return next_transition(now, appliances if appliances is not None else get_appliance_state(save=False))
+
+    def seconds_until_transition(self, now: datetime, inputs=None) -> float:
+        """Seconds until the next transition (or track end), so the loop can wake right on it."""
+        seconds = max(0.0, (self.next_transition(now, (inputs or {}).get("appliances")) - now).total_seconds())
+        if inputs and inputs["view"] == "spotify":
+            # The track's progress is a few moments old; wake just after it ends
+            seconds = min(seconds, track_seconds_left(inputs["track"]) + 1)
+        return seconds
+
+    def prepare(self, now: datetime, current_fingerprint: str, appliances=None) -> None:
+        """Render the next transition's frame if it is within `lead` seconds and not rendered yet."""
+        at = self.next_transition(now, appliances)
+        if (at - now).total_seconds() > self.lead:
+            return
+        if self._prepared is not None and self._prepared.at == at:
+            return
+        self._prepare(at, self._collect(at), current_fingerprint)
+
+    def prepare_next_track(self, inputs: dict, current_fingerprint: str) -> None:
+        """
+        Render the Spotify screen of the next queued track once the playing
+        one (inputs from a Spotify view) is within NEXT_TRACK_LEAD seconds of
+        ending. Its album art is fetched and cached on the way.
+        """
+        track = inputs["track"]
+        seconds_left = track_seconds_left(track)
+        if seconds_left > NEXT_TRACK_LEAD or self._next_track_for == track.get("id"):
+            return
+        if time.monotonic() < self._next_track_retry_at:
+            return
+        next_track = get_next_track()
+        if not next_track:
+            self._next_track_retry_at = time.monotonic() + NEXT_TRACK_RETRY
+            return
+        self._next_track_for = track.get("id")
+        next_track["is_playing"] = True
+        at = inputs["now"] + timedelta(seconds=seconds_left)
+        self._prepare(at, dict(inputs, now=at, track=next_track), current_fingerprint)
+
+    def _prepare(self, at: datetime, inputs: dict, current_fingerprint: str) -> None:
+        if self._prepared is not None:
+            self.stats["wasted"] += 1
+
+        start = time.perf_counter()
+        fingerprint = self._fingerprint(inputs)
+        image = panel_frame = None
+        if fingerprint != current_fingerprint:
+            image = self._render(inputs)
+            panel_frame = self._panel_frame(inputs, image)
+            # Rendering may have fetched data the fingerprint depends on (album art)
+            fingerprint = self._fingerprint(inputs)
+        self._prepared = PreparedFrame(at, fingerprint, image, panel_frame)
+        self.stats["prepared"] += 1
+        logging.debug(f"Pre-rendered frame for {at:%H:%M:%S} in {(time.perf_counter() - start) * 1000:.0f} ms"
+                      f"{'' if image else ' (no change)'}")
+
+    def take(self, fingerprint: str) -> PreparedFrame | None:
+        """The prepared frame if it matches the scene now being shown, else None."""
+        prepared = self._prepared
+        if prepared is None or prepared.image is None or prepared.fingerprint != fingerprint:
+            return None
+        self._prepared = None
+        self.stats["used"] += 1
+        return prepared
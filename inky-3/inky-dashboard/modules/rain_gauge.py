@@ -3,8 +3,8 @@ Rain gauge overlay for the dashboard.
 Calculates rain level from forecast and overlays the appropriate image.
 """
 
-from PIL import Image
 import os
+from modules.layers import load_layer, paste_layer
 
 def get_rain_gauge_level_from_forecast(forecast_data):
     """
@@ -26,16 +26,20 @@ def get_rain_gauge_level_from_forecast(forecast_data):
     else:
         return 1  # dry
 
-def draw_rain_gauge(image, forecast_data):
+def get_rain_gauge_layer(forecast_data):
     """
-    Overlay the rain gauge image corresponding to the forecasted rain level.
+    Return the trimmed rain gauge layer for the forecasted rain level.
     """
     level = get_rain_gauge_level_from_forecast(forecast_data)
     filename = f"rain_gauge_{level}.png"
     path = os.path.join("assets", "appliances", filename)
+    return load_layer(path)
 
+def draw_rain_gauge(image, forecast_data):
+    """
+    Overlay the rain gauge image corresponding to the forecasted rain level.
+    """
     try:
-        overlay = Image.open(path).convert("RGBA")
-        image.paste(overlay, (0, 0), overlay)
+        paste_layer(image, get_rain_gauge_layer(forecast_data))
     except Exception:
         pass
@@ -0,0 +1,156 @@
+"""
+Single scheduler for e-paper panel refreshes.
+Every visual change is submitted with a cause. Urgent causes go out at once;
+the rest wait for a minimum interval since the last refresh, so several
+pending changes are merged into one slow panel refresh.
+"""
+
+from collections import deque
+import threading
+import time
+import logging
+from config import MIN_REFRESH_INTERVAL, DEFERRED_REFRESH_INTERVAL
+
+__all__ = [
+    "RefreshScheduler",
+    "get_refresh_scheduler",
+    "PRIORITY_IMMEDIATE",
+    "PRIORITY_NORMAL",
+    "PRIORITY_DEFERRED",
+    "CAUSE_PRIORITIES",
+]
+
+PRIORITY_IMMEDIATE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_DEFERRED = 2
+
+# Why the screen changed -> how urgently the panel should follow
+CAUSE_PRIORITIES = {
+    "startup": PRIORITY_IMMEDIATE,
+    "manual": PRIORITY_IMMEDIATE,   # POST /refresh
+    "button": PRIORITY_IMMEDIATE,
+    "track": PRIORITY_IMMEDIATE,
+    "jam": PRIORITY_IMMEDIATE,
+    "view": PRIORITY_IMMEDIATE,     # spotify / cooldown / main switch
+    "retry": PRIORITY_NORMAL,       # the panel failed to show the last frame
+    "appliance": PRIORITY_NORMAL,   # level change from day rollover or timers
+    "clock": PRIORITY_NORMAL,
+    "weather": PRIORITY_DEFERRED,
+    "calendar": PRIORITY_DEFERRED,
+}
+
+class RefreshScheduler:
+    """Holds the newest unshown frame and decides when it goes to the panel."""
+
+    def __init__(self, min_interval=MIN_REFRESH_INTERVAL, deferred_interval=DEFERRED_REFRESH_INTERVAL):
+        self.intervals = {
+            PRIORITY_IMMEDIATE: 0,
+            PRIORITY_NORMAL: min_interval,
+            PRIORITY_DEFERRED: deferred_interval,
+        }
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._noted = set()
+        self._pending = {}  # cause -> monotonic time first seen
+        self._frame = None
+        self._last_refresh = None
+        self._refresh_times = deque()
+        self.stats = {"refreshes": 0, "submitted": 0, "superseded": 0, "waits": {}}
+
+    def note_cause(self, cause: str) -> None:
+        """Record an event from another thread (button press, HTTP request) and wake the loop."""
+        with self._lock:
+            self._noted.add(cause)
+        self._wake.set()
+
+    def wake(self) -> None:
+        """Wake the loop without recording a cause, e.g. when the panel becomes free."""
+        self._wake.set()
+
+    def take_noted(self) -> set:
+        """Return and clear causes recorded with note_cause()."""
+        with self._lock:
+            noted, self._noted = self._noted, set()
+        return noted
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds; returns True if woken early by note_cause()."""
+        woken = self._wake.wait(timeout)
+        self._wake.clear()
+        return woken
+
+    def submit(self, frame, causes, now=None) -> None:
+        """Offer a frame that differs from the panel. Replaces any frame not yet shown."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._frame is not None:
+                self.stats["superseded"] += 1
+            self._frame = frame
+            self.stats["submitted"] += 1
+            for cause in causes or ("unknown",):
+                self._pending.setdefault(cause, now)
+
+    def clear(self) -> None:
+        """Drop the pending frame, e.g. because the screen went back to what the panel shows."""
+        with self._lock:
+            self._frame = None
+            self._pending.clear()
+
+    def _priority(self) -> int:
+        priority = min(CAUSE_PRIORITIES.get(cause, PRIORITY_NORMAL) for cause in self._pending)
+        # A retry carries the failed frame's causes but never goes out faster than a retry
+        if "retry" in self._pending:
+            priority = max(priority, CAUSE_PRIORITIES["retry"])
+        return priority
+
+    def seconds_until_due(self, now=None) -> float | None:
+        """Seconds until the pending frame may be shown (0 if due now), or None if nothing is pending."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._frame is None:
+                return None
+            if self._last_refresh is None:
+                return 0.0
+            interval = self.intervals[self._priority()]
+            return max(0.0, self._last_refresh + interval - now)
+
+    def due(self, now=None) -> bool:
+        """True if the pending frame should be pushed to the panel now."""
+        return self.seconds_until_due(now) == 0.0
+
+    def take(self, now=None):
+        """Hand over the pending frame and its causes, and record the refresh."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            frame, pending = self._frame, self._pending
+            self._frame, self._pending = None, {}
+            self._last_refresh = now
+            self._refresh_times.append(now)
+            self.stats["refreshes"] += 1
+            for cause, first_seen in pending.items():
+                waited = now - first_seen
+                entry = self.stats["waits"].setdefault(cause, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+                entry["count"] += 1
+                entry["total_s"] += waited
+                entry["max_s"] = max(entry["max_s"], waited)
+        waits = ", ".join(f"{cause} {now - first_seen:.0f}s" for cause, first_seen in pending.items())
+        logging.info(f"Panel refresh for {waits}; {self.refreshes_last_hour(now)} refreshes in the last hour")
+        return frame, set(pending)
+
+    def refreshes_last_hour(self, now=None) -> int:
+        """Number of panel refreshes in the last 60 minutes."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            while self._refresh_times and now - self._refresh_times[0] > 3600:
+                self._refresh_times.popleft()
+            return len(self._refresh_times)
+
+# Shared scheduler for the dashboard process
+_refresh_scheduler = None
+
+def get_refresh_scheduler():
+    """Get singleton refresh scheduler."""
+    global _refresh_scheduler
+    if _refresh_scheduler is None:
+        _refresh_scheduler = RefreshScheduler()
+    return _refresh_scheduler
@@ -0,0 +1,208 @@
+"""
+Retained-mode scene graph for the main dashboard.
+Each widget declares the inputs it depends on and the screen region it draws
+into. Only widgets whose input fingerprint changed are re-rendered, and only
+the screen areas they cover are re-composited onto the retained frame.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageDraw
+import time
+import logging
+from modules.layers import Layer, intersect_box, trim_layer
+from modules.compositor import Compositor, numpy_available
+
+__all__ = ["Widget", "Scene", "render_on_canvas"]
+
+_UNSET = object()
+
+class Widget:
+    """
+    A drawable part of the dashboard.
+
+    fingerprint(inputs) returns a hashable summary of everything the widget's
+    output depends on. render(inputs) returns a Layer in frame coordinates, or
+    None to draw nothing. Output outside `region` is clipped. `cause` names
+    the kind of change a new fingerprint represents (see refresh_scheduler).
+    """
+
+    def __init__(self, name, region, fingerprint, render, cause=None):
+        self.name = name
+        self.region = region
+        self.fingerprint = fingerprint
+        self.render = render
+        self.cause = cause
+        self.key = _UNSET
+        self.layer = None
+
+def render_on_canvas(region, draw_fn) -> Layer | None:
+    """
+    Run draw_fn(draw, canvas, origin) on a transparent RGBA canvas covering
+    `region` and return the trimmed result as a Layer. `origin` is the frame
+    position of the canvas' top-left corner, for translating coordinates.
+    """
+    x0, y0, x1, y1 = region
+    canvas = Image.new("RGBA", (x1 - x0, y1 - y0), (0, 0, 0, 0))
+    draw_fn(ImageDraw.Draw(canvas), canvas, (x0, y0))
+    return trim_layer(canvas, (x0, y0))
+
+def _merge_boxes(boxes):
+    """Merge overlapping boxes so no pixel is composited twice."""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if intersect_box(a, b):
+                    boxes[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return boxes
+
+def _clip_layer(layer, region):
+    """Crop a layer to the given frame region."""
+    if layer is None:
+        return None
+    box = intersect_box(layer.box, region)
+    if box is None:
+        return None
+    if box == layer.box:
+        return layer
+    x, y = layer.offset
+    cropped = layer.image.crop((box[0] - x, box[1] - y, box[2] - x, box[3] - y))
+    return Layer(cropped, box[:2])
+
+class Scene:
+    """
+    Widgets composited bottom to top onto a retained RGB frame.
+    The first widget is the background and must return an opaque full-frame layer.
+    `engine` is "pillow" (paste layer by layer) or "numpy" (premultiplied blend).
+    With `workers` > 1, widgets that need re-rendering are rasterized
+    concurrently; render functions must then be safe to run in parallel.
+    """
+
+    def __init__(self, size, widgets, engine="pillow", workers=1):
+        self.size = size
+        self.widgets = widgets
+        self.frame = None
+        self._output = None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="widget") if workers > 1 else None
+        self._compositor = None
+        if engine == "numpy":
+            if numpy_available():
+                self._compositor = Compositor(size)
+            else:
+                logging.warning("NumPy is not installed; compositing with Pillow")
+        self.stats = {
+            "frames": 0,
+            "recomposed_frames": 0,
+            "recomposed_pixels": 0,
+            "widget_renders": {widget.name: 0 for widget in widgets},
+            "widget_ms": {widget.name: {"total": 0.0, "last": None, "max": 0.0} for widget in widgets},
+            "render_ms": {"total": 0.0, "last": None},
+        }
+
+    def fingerprints(self, inputs) -> dict:
+        """Widget fingerprints grouped by cause (or by name for widgets without one)."""
+        grouped = {}
+        for widget in self.widgets:
+            grouped.setdefault(widget.cause or widget.name, []).append(widget.fingerprint(inputs))
+        return {cause: tuple(keys) for cause, keys in grouped.items()}
+
+    def _render_widget(self, widget, inputs):
+        """Render one widget; returns (layer, error, milliseconds)."""
+        frame_box = (0, 0) + tuple(self.size)
+        start = time.perf_counter()
+        try:
+            layer = _clip_layer(widget.render(inputs), intersect_box(widget.region, frame_box))
+            error = None
+        except Exception as e:
+            layer, error = None, e
+        return layer, error, (time.perf_counter() - start) * 1000
+
+    def _update_widgets(self, inputs) -> list:
+        """Re-render widgets whose fingerprint changed; return the frame boxes they touched."""
+        stale = []
+        for widget in self.widgets:
+            key = widget.fingerprint(inputs)
+            if widget.key is _UNSET or widget.key != key:
+                stale.append((widget, key))
+        if not stale:
+            return []
+
+        start = time.perf_counter()
+        if self._pool and len(stale) > 1:
+            futures = [self._pool.submit(self._render_widget, widget, inputs) for widget, _ in stale]
+            results = [future.result() for future in futures]
+        else:
+            results = [self._render_widget(widget, inputs) for widget, _ in stale]
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        dirty = []
+        for (widget, key), (layer, error, elapsed_ms) in zip(stale, results):
+            old_box = widget.layer.box if widget.layer else None
+            if error is None:
+                widget.layer, widget.key = layer, key
+            else:
+                logging.warning(f"Widget '{widget.name}' failed to render: {error}")
+                widget.layer = None
+                widget.key = _UNSET  # try again next frame
+            self.stats["widget_renders"][widget.name] += 1
+            timing = self.stats["widget_ms"][widget.name]
+            timing["total"] += elapsed_ms
+            timing["last"] = round(elapsed_ms, 1)
+            timing["max"] = max(timing["max"], round(elapsed_ms, 1))
+
+            for box in (old_box, widget.layer.box if widget.layer else None):
+                if box:
+                    dirty.append(box)
+
+        self.stats["render_ms"]["total"] += wall_ms
+        self.stats["render_ms"]["last"] = round(wall_ms, 1)
+        timings = ", ".join(f"{widget.name} {result[2]:.0f} ms" for (widget, _), result in zip(stale, results))
+        logging.debug(f"Rendered {timings} in {wall_ms:.0f} ms wall time")
+        return dirty
+
+    def _compose(self, box) -> None:
+        """Rebuild one frame box from the widget layers, bottom to top."""
+        x0, y0, x1, y1 = box
+        base = self.widgets[0].layer
+        if self._compositor:
+            region = self._compositor.compose(box, base.image if base else None,
+                                              [widget.layer for widget in self.widgets[1:]])
+        else:
+            if base:
+                region = base.image.crop(box).convert("RGB")
+            else:
+                region = Image.new("RGB", (x1 - x0, y1 - y0), "white")
+            for widget in self.widgets[1:]:
+                layer = widget.layer
+                if layer and intersect_box(layer.box, box):
+                    region.paste(layer.image, (layer.offset[0] - x0, layer.offset[1] - y0), layer.image)
+        self.frame.paste(region, (x0, y0))
+        self.stats["recomposed_pixels"] += (x1 - x0) * (y1 - y0)
+
+    def render(self, inputs) -> Image.Image:
+        """
+        Bring the retained frame up to date with `inputs` and return it.
+        A new image is returned only when something changed; callers must not draw on it.
+        """
+        self.stats["frames"] += 1
+        dirty = self._update_widgets(inputs)
+        if self.frame is None:
+            self.frame = Image.new("RGB", self.size, "white")
+            dirty = [(0, 0) + tuple(self.size)]
+
+        boxes = _merge_boxes(dirty)
+        for box in boxes:
+            self._compose(box)
+
+        if boxes or self._output is None:
+            self.stats["recomposed_frames"] += 1
+            self._output = self.frame.copy()
+        return self._output
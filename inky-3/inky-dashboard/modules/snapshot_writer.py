@@ -0,0 +1,108 @@
+"""
+Background writer for frame snapshots.
+Encodes and saves the latest displayed frame off the render thread. Only the
+newest pending frame is kept, so a slow SD card never builds up a queue.
+"""
+
+from PIL import Image
+import threading
+import time
+import logging
+from modules.atomic_io import write_atomic
+from config import SNAPSHOT_FORMATS, SNAPSHOT_PNG_LEVEL
+
+__all__ = ["SnapshotWriter", "get_snapshot_writer", "snapshot_path", "SNAPSHOT_BASE"]
+
+# Snapshots are written next to the app as simulated_output.<ext>
+SNAPSHOT_BASE = "simulated_output"
+
+# format name -> (file extension, Pillow format, save options)
+_FORMATS = {
+    "raw": (".ppm", "PPM", {}),
+    "png": (".png", "PNG", {"compress_level": SNAPSHOT_PNG_LEVEL}),
+}
+
+def snapshot_path(fmt: str, base: str = SNAPSHOT_BASE) -> str:
+    """File a snapshot in the given format is written to."""
+    return base + _FORMATS[fmt][0]
+
+class SnapshotWriter:
+    """Writes the most recently submitted frame in each configured format."""
+
+    def __init__(self, base: str = SNAPSHOT_BASE, formats=SNAPSHOT_FORMATS):
+        unknown = [f for f in formats if f not in _FORMATS]
+        if unknown:
+            logging.warning(f"Ignoring unknown snapshot formats: {unknown}")
+        self.base = base
+        self.formats = [f for f in formats if f in _FORMATS]
+        self._pending = None
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self.stats = {
+            "written": 0,
+            "superseded": 0,
+            "bytes": 0,
+            "encode_ms": 0.0,
+            "last_bytes": {},
+            "last_encode_ms": {},
+        }
+
+    def submit(self, image: Image.Image) -> None:
+        """Queue a frame for writing, replacing any frame not yet written."""
+        with self._cond:
+            if self._pending is not None:
+                self.stats["superseded"] += 1
+            self._pending = image
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def write(self, image: Image.Image) -> None:
+        """Write a frame synchronously in every configured format."""
+        for fmt in self.formats:
+            _, pil_format, options = _FORMATS[fmt]
+            path = snapshot_path(fmt, self.base)
+            start = time.perf_counter()
+            try:
+                size = write_atomic(path, lambda f: image.save(f, pil_format, **options))
+            except Exception as e:
+                logging.error(f"Failed to write snapshot {path}: {e}")
+                continue
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.stats["written"] += 1
+            self.stats["bytes"] += size
+            self.stats["encode_ms"] += elapsed_ms
+            self.stats["last_bytes"][fmt] = size
+            self.stats["last_encode_ms"][fmt] = round(elapsed_ms, 1)
+            logging.debug(f"Snapshot {path}: {size} bytes in {elapsed_ms:.0f} ms")
+
+    def flush(self) -> None:
+        """Write any pending frame now, e.g. before the process exits."""
+        with self._write_lock:
+            with self._cond:
+                image, self._pending = self._pending, None
+            if image is not None:
+                self.write(image)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+            with self._write_lock:
+                with self._cond:
+                    image, self._pending = self._pending, None
+                if image is not None:
+                    self.write(image)
+
+# Shared writer for the dashboard process
+_snapshot_writer = None
+
+def get_snapshot_writer():
+    """Get singleton snapshot writer."""
+    global _snapshot_writer
+    if _snapshot_writer is None:
+        _snapshot_writer = SnapshotWriter()
+    return _snapshot_writer
@@ -11,6 +11,21 @@ import logging
 from pathlib import Path
 from datetime import datetime, timedelta
 
+def _track_info(item, playback=None):
+    """Track dict for a Spotify track object, with playback progress if known."""
+    playback = playback or {}
+    return {
+        "id": item["id"],
+        "title": item["name"],
+        "artist": ", ".join([a["name"] for a in item["artists"]]),
+        "album": item["album"]["name"],
+        "album_id": item["album"].get("id"),
+        "art_url": item["album"]["images"][0]["url"] if item["album"]["images"] else None,
+        "is_playing": playback.get("is_playing", False),
+        "progress_ms": playback.get("progress_ms", 0),
+        "duration_ms": item.get("duration_ms", 0)
+    }
+
 class SpotifyClient:
     def __init__(self):
         self.auth_dir = Path(__file__).parent.parent / "auth"
@@ -126,16 +141,7 @@ class SpotifyClient:
             if not item:
                 return None
             
-            return {
-                "id": item["id"],
-                "title": item["name"],
-                "artist": ", ".join([a["name"] for a in item["artists"]]),
-                "album": item["album"]["name"],
-                "art_url": item["album"]["images"][0]["url"] if item["album"]["images"] else None,
-                "is_playing": playback.get("is_playing", False),
-                "progress_ms": playback.get("progress_ms", 0),
-                "duration_ms": item.get("duration_ms", 0)
-            }
+            return _track_info(item, playback)
             
         except spotipy.exceptions.SpotifyException as e:
             if e.http_status == 401:
@@ -149,6 +155,19 @@ class SpotifyClient:
             logging.error(f"Failed to get current track: {e}")
             return None
 
+    def get_next_track(self):
+        """Get the first track in the playback queue, or None (episodes are skipped)."""
+        try:
+            queue = self.get_client().queue() or {}
+            items = queue.get("queue") or []
+            item = items[0] if items else None
+            if not item or item.get("type", "track") != "track" or not item.get("album"):
+                return None
+            return _track_info(item)
+        except Exception as e:
+            logging.error(f"Failed to get playback queue: {e}")
+            return None
+
 # Global client instance
 _spotify_client = None
 
@@ -163,6 +182,10 @@ def get_current_track():
     """Get currently playing track (backward compatibility)."""
     return get_spotify_client().get_current_track()
 
+def get_next_track():
+    """Get the track queued to play next."""
+    return get_spotify_client().get_next_track()
+
 # Jam URL handling (keeping your existing functionality)
 JAM_PATH = Path(__file__).parent.parent / "jam_url.txt"
 
@@ -193,6 +216,7 @@ def set_jam_url(url):
 
 __all__ = [
     "get_current_track", 
+    "get_next_track",
     "get_jam_url", 
     "clear_jam_url", 
     "set_jam_url",
@@ -1,21 +1,45 @@
 from PIL import Image, ImageDraw, ImageFilter, ImageFont
-import requests
 import qrcode
-from io import BytesIO
+from collections import OrderedDict
 from modules.spotify_connect import get_current_track, get_jam_url, clear_jam_url
+from modules.album_art import get_album_art
+from modules.dither import dither_to_panel
+from modules.palette import quantize_to_panel
+from config import DISPLAY_SIZE, DITHER_MODE
 import os
 from datetime import datetime
 import socket
+import time
 import logging
 
-# Simple in-process cache for album art to reduce network calls while the same track plays
-_ALBUM_ART_CACHE = {
-    "track_id": None,
-    "image": None,
+QR_SIZE = (200, 200)
+QR_POS = (1380, 20)
+BLUR_RADIUS = 30
+BLUR_DOWNSCALE = 8
+MAX_CACHED_BACKGROUNDS = 4
+MAX_CACHED_QR_TILES = 8
+LOCAL_IP_REFRESH_S = 300
+
+# album art key (or "fallback") -> rendered background + art
+_BACKGROUND_CACHE = OrderedDict()
+
+# (album art key, dither mode) -> background + art dithered to the panel palette
+_DITHERED_CACHE = OrderedDict()
+
+# URL -> QR code tile
+_QR_CACHE = {}
+
+_LOCAL_IP_CACHE = {
+    "ip": None,
+    "checked": 0.0,
 }
 
-def get_local_ip():
-    """Returns the local IP address of the Pi."""
+def get_local_ip(max_age: float = LOCAL_IP_REFRESH_S):
+    """Returns the local IP address of the Pi, looked up at most every `max_age` seconds."""
+    now = time.monotonic()
+    if _LOCAL_IP_CACHE["ip"] is not None and now - _LOCAL_IP_CACHE["checked"] < max_age:
+        return _LOCAL_IP_CACHE["ip"]
+
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     try:
         # Doesn't have to be reachable
@@ -25,12 +49,16 @@ def get_local_ip():
         ip = '127.0.0.1'
     finally:
         s.close()
+    _LOCAL_IP_CACHE["ip"] = ip
+    _LOCAL_IP_CACHE["checked"] = now
     return ip
 
+def jam_entry_url() -> str:
+    """The local page where a Jam link can be entered by hand."""
+    return f"http://{get_local_ip()}:5000/"
+
 def draw_spotify_screen(base_image: Image.Image):
     logging.debug("Starting Spotify view rendering")
-    base_image = Image.new("RGB", (1600, 1200), (50, 50, 50))
-
     track = get_current_track()
 
     if not track:
@@ -38,26 +66,24 @@ def draw_spotify_screen(base_image: Image.Image):
         clear_jam_url()
         return None  # Viktig: la layout.py håndtere fallback
 
-    # Fetch or reuse album art with caching per track id
-    album_art = None
-    try:
-        if _ALBUM_ART_CACHE["track_id"] == track.get("id") and _ALBUM_ART_CACHE["image"] is not None:
-            album_art = _ALBUM_ART_CACHE["image"]
-            logging.debug("Reusing cached album art for current track")
-        else:
-            response = requests.get(track["art_url"], timeout=5)
-            response.raise_for_status()
-            album_art = Image.open(BytesIO(response.content)).convert("RGB")
-            _ALBUM_ART_CACHE["track_id"] = track.get("id")
-            _ALBUM_ART_CACHE["image"] = album_art
-            logging.debug("Downloaded album art from Spotify")
-    except Exception as e:
-        logging.error(f"Album art download failed, using fallback: {e}")
-        album_art = Image.open("assets/fallback_art.jpg").convert("RGB")
+    return render_spotify_screen(track, get_jam_url())
+
+def _blur_background(album_art: Image.Image) -> Image.Image:
+    """
+    Full-screen blurred art. Blurring at 1/BLUR_DOWNSCALE size and scaling up
+    looks the same as a radius-30 blur at full size for a fraction of the work.
+    """
+    small_size = (DISPLAY_SIZE[0] // BLUR_DOWNSCALE, DISPLAY_SIZE[1] // BLUR_DOWNSCALE)
+    small = album_art.resize(small_size, Image.Resampling.BOX)
+    small = small.filter(ImageFilter.GaussianBlur(radius=BLUR_RADIUS / BLUR_DOWNSCALE))
+    return small.resize(DISPLAY_SIZE, Image.Resampling.BILINEAR)
+
+def _render_background(album_art: Image.Image) -> Image.Image:
+    """Blurred art with the centred album cover on top."""
+    base_image = Image.new("RGB", DISPLAY_SIZE, (50, 50, 50))
 
     try:
-        blurred = album_art.resize((1600, 1200)).filter(ImageFilter.GaussianBlur(radius=30))
-        base_image.paste(blurred, (0, 0))
+        base_image.paste(_blur_background(album_art), (0, 0))
         logging.debug("Applied blurred album art background")
     except Exception as e:
         logging.error(f"Background blur failed: {e}")
@@ -68,30 +94,82 @@ def draw_spotify_screen(base_image: Image.Image):
         scale = target_h / art_h
         target_w = int(art_w * scale)
         art = album_art.resize((target_w, target_h))
-        x = (1600 - target_w) // 2
-        y = (1200 - target_h) // 2
+        x = (DISPLAY_SIZE[0] - target_w) // 2
+        y = (DISPLAY_SIZE[1] - target_h) // 2
         base_image.paste(art, (x, y))
         logging.debug("Pasted centered album art without distortion")
     except Exception as e:
         logging.error(f"Album art placement failed: {e}")
 
-    jam_url = get_jam_url()
+    return base_image
+
+def _track_background(track: dict) -> tuple[Image.Image, str]:
+    album_art, key = get_album_art(track)
+    background = _BACKGROUND_CACHE.get(key)
+    if background is None:
+        background = _render_background(album_art)
+        _BACKGROUND_CACHE[key] = background
+        while len(_BACKGROUND_CACHE) > MAX_CACHED_BACKGROUNDS:
+            _BACKGROUND_CACHE.popitem(last=False)
+    else:
+        _BACKGROUND_CACHE.move_to_end(key)
+    return background, key
+
+def get_track_background(track: dict) -> Image.Image:
+    """Background + album art layer for a track, cached per cover. Shared; don't modify."""
+    return _track_background(track)[0]
+
+def get_dithered_background(track: dict, mode: str = DITHER_MODE) -> Image.Image:
+    """The track background dithered to the panel palette, done once per cover. Shared; don't modify."""
+    background, key = _track_background(track)
+    dithered = _DITHERED_CACHE.get((key, mode))
+    if dithered is None:
+        start = time.perf_counter()
+        dithered = dither_to_panel(background, mode)
+        logging.debug(f"Dithered album art ({mode}) in {(time.perf_counter() - start) * 1000:.0f} ms")
+        _DITHERED_CACHE[(key, mode)] = dithered
+        while len(_DITHERED_CACHE) > MAX_CACHED_BACKGROUNDS:
+            _DITHERED_CACHE.popitem(last=False)
+    else:
+        _DITHERED_CACHE.move_to_end((key, mode))
+    return dithered
+
+def get_qr_tile(url: str) -> Image.Image:
+    """QR code tile for a URL, cached per URL. Shared; don't modify."""
+    tile = _QR_CACHE.get(url)
+    if tile is None:
+        tile = qrcode.make(url).convert("RGB").resize(QR_SIZE)
+        if len(_QR_CACHE) >= MAX_CACHED_QR_TILES:
+            _QR_CACHE.clear()
+        _QR_CACHE[url] = tile
+    return tile
+
+def render_spotify_screen(track: dict, jam_url: str | None) -> Image.Image:
+    """Render the now-playing screen for an already fetched track."""
+    base_image = get_track_background(track).copy()
+
     if jam_url:
         try:
-            qr = qrcode.make(jam_url).convert("RGB").resize((200, 200))
-            base_image.paste(qr, (1380, 20))
+            base_image.paste(get_qr_tile(jam_url), QR_POS)
             logging.debug("Added QR code for Jam link in top-right corner")
         except Exception as e:
             logging.error(f"QR code render failed: {e}")
     else:
-        pi_ip = get_local_ip()
         # No timeout for QR availability as requested; page is always available for manual Jam URL entry
-        jam_entry_url = f"http://{pi_ip}:5000/"
+        entry_url = jam_entry_url()
         try:
-            qr = qrcode.make(jam_entry_url).convert("RGB").resize((200, 200))
-            base_image.paste(qr, (1380, 20))
-            logging.debug(f"Added QR for Jam entry page {jam_entry_url} in top-right corner")
+            base_image.paste(get_qr_tile(entry_url), QR_POS)
+            logging.debug(f"Added QR for Jam entry page {entry_url} in top-right corner")
         except Exception as e:
             logging.error(f"QR code for Jam entry page failed: {e}")
 
     return base_image
+
+def render_spotify_panel_frame(track: dict, jam_url: str | None, mode: str = DITHER_MODE) -> Image.Image:
+    """The now-playing screen in panel colours, with the art dithered and the QR code kept crisp."""
+    frame = get_dithered_background(track, mode).copy()
+    try:
+        frame.paste(quantize_to_panel(get_qr_tile(jam_url or jam_entry_url())), QR_POS)
+    except Exception as e:
+        logging.error(f"QR code render failed: {e}")
+    return frame
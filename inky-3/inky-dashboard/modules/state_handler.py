@@ -6,9 +6,9 @@ Handles loading, saving, and updating appliance run states and timers.
 import json
 from datetime import datetime, timedelta
 import os
-import tempfile
 import threading
 import logging
+from modules.atomic_io import write_atomic
 
 STATE_FILE = "state.json"
 _STATE_LOCK = threading.Lock()
@@ -54,18 +54,7 @@ def save_state(state):
     }
     try:
         with _STATE_LOCK:
-            dir_name = os.path.dirname(STATE_FILE) or "."
-            fd, tmp_path = tempfile.mkstemp(prefix="state.", suffix=".tmp", dir=dir_name)
-            try:
-                with os.fdopen(fd, "w") as tmp_f:
-                    json.dump(serializable, tmp_f, indent=2)
-                os.replace(tmp_path, STATE_FILE)
-            finally:
-                try:
-                    if os.path.exists(tmp_path):
-                        os.remove(tmp_path)
-                except Exception:
-                    pass
+            write_atomic(STATE_FILE, lambda f: json.dump(serializable, f, indent=2), text=True)
     except Exception as e:
         logging.error(f"Failed to save state: {e}")
 
@@ -77,8 +66,8 @@ def mark_appliance_run(state, name):
     }
     save_state(state)
 
-def update_running_status(state):
-    """Update running status based on elapsed time since start."""
+def update_running_status(state, save=True):
+    """Update running status based on elapsed time since start; `save` writes it back."""
     now = datetime.now()
     for name, data in state.items():
         if data.get("is_running"):
@@ -86,12 +75,13 @@ def update_running_status(state):
             duration = RUN_DURATIONS.get(name, timedelta(minutes=60))
             if now - started >= duration:
                 data["is_running"] = False
-    save_state(state)
+    if save:
+        save_state(state)
 
-def get_appliance_state():
-    """Get current appliance state with updated running status."""
+def get_appliance_state(save=True):
+    """Get current appliance state with updated running status (not written back unless `save`)."""
     state = load_state()
-    update_running_status(state)
+    update_running_status(state, save)
     return [
         {"prefix": name, "last_run": data["last_run"], "is_running": data["is_running"]}
         for name, data in state.items()
@@ -0,0 +1,72 @@
+"""
+Text measuring and line wrapping for the render modules.
+Widths are memoized per (font, string) and lines are wrapped with a binary
+search over word counts, so each line costs O(log words) measurements.
+"""
+
+import threading
+from modules.fonts import font_key
+
+__all__ = ["text_width", "wrap_text", "get_text_layout_stats", "clear_text_layout_cache"]
+
+# Memoized widths are dropped wholesale past this many entries
+MAX_WIDTH_ENTRIES = 4096
+
+# (font key, text) -> advance width in pixels
+_WIDTHS = {}
+_WIDTHS_LOCK = threading.Lock()
+_STATS = {"measured": 0, "reused": 0}
+
+def text_width(font, text: str) -> int:
+    """Right edge of `text` drawn at x=0, as draw.textbbox() reports it."""
+    key = (font_key(font), text)
+    with _WIDTHS_LOCK:
+        width = _WIDTHS.get(key)
+        if width is not None:
+            _STATS["reused"] += 1
+            return width
+    width = font.getbbox(text)[2]
+    with _WIDTHS_LOCK:
+        if len(_WIDTHS) >= MAX_WIDTH_ENTRIES:
+            _WIDTHS.clear()
+        _WIDTHS[key] = width
+        _STATS["measured"] += 1
+    return width
+
+def wrap_text(font, text: str, max_width: int) -> list[str]:
+    """
+    Greedily wrap `text` on spaces so each line fits `max_width`.
+    A line is measured with its trailing space, and a single word wider than
+    the limit gets a line of its own. As with the word-by-word wrapper this
+    replaced, an oversized first word is preceded by an empty line and empty
+    text gives one empty line; callers count those against their line limit.
+    """
+    words = text.split()
+    if not words:
+        return [""]
+    lines = [""] if text_width(font, words[0] + " ") > max_width else []
+    start = 0
+    while start < len(words):
+        # Largest end such that words[start:end] fits; always take one word
+        lo, hi = start + 1, len(words)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if text_width(font, " ".join(words[start:mid]) + " ") <= max_width:
+                lo = mid
+            else:
+                hi = mid - 1
+        lines.append(" ".join(words[start:lo]))
+        start = lo
+    return lines
+
+def get_text_layout_stats() -> dict:
+    """Return how many widths were measured vs served from the memo."""
+    with _WIDTHS_LOCK:
+        stats = dict(_STATS)
+        stats["entries"] = len(_WIDTHS)
+    return stats
+
+def clear_text_layout_cache() -> None:
+    """Drop all memoized widths."""
+    with _WIDTHS_LOCK:
+        _WIDTHS.clear()
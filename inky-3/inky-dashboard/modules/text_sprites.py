@@ -0,0 +1,79 @@
+"""
+Cached sprites for rotated or handwritten text.
+Text is drawn once per (text, font, angle, colour, canvas), rotated, trimmed
+to its visible pixels and reused until something about it changes.
+"""
+
+from collections import OrderedDict
+from PIL import Image, ImageDraw
+import threading
+from modules.layers import Layer, trim_layer
+from modules.fonts import font_key
+
+__all__ = ["render_text_sprite", "get_sprite_stats", "clear_sprite_cache"]
+
+# Least recently used sprites are dropped past this many entries
+MAX_SPRITES = 64
+
+_SPRITES = OrderedDict()
+_SPRITES_LOCK = threading.Lock()
+_STATS = {"hits": 0, "misses": 0}
+
+def _draw_centred(text: str, font, fill, canvas) -> Image.Image:
+    """Draw the lines of `text` centred on a transparent canvas."""
+    lines = text.split("\n")
+    boxes = [font.getbbox(line) for line in lines]
+    if canvas is None:
+        # Room for every line plus a font-size margin for ascenders and overhangs
+        canvas = (
+            max(box[2] - box[0] for box in boxes) + 2 * font.size,
+            sum(box[3] - box[1] for box in boxes) + 2 * font.size,
+        )
+    width, height = canvas
+    image = Image.new("RGBA", canvas, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+
+    y_offset = (height - sum(box[3] - box[1] for box in boxes)) / 2
+    for line, box in zip(lines, boxes):
+        draw.text(((width - (box[2] - box[0])) / 2, y_offset), line, font=font, fill=fill)
+        y_offset += box[3] - box[1]
+    return image
+
+def render_text_sprite(text: str, font, angle: float = 0, fill=(0, 0, 0), canvas=None) -> Layer | None:
+    """
+    Render multi-line text centred on a transparent canvas, rotated by `angle`
+    degrees (counter-clockwise, canvas expanded to fit) and trimmed.
+    The Layer offset is relative to the top-left of the rotated canvas;
+    `canvas` fixes its size, otherwise it is fitted to the text.
+    The returned image is shared and must not be modified.
+    """
+    key = (text, font_key(font), angle, fill, canvas)
+    with _SPRITES_LOCK:
+        if key in _SPRITES:
+            _SPRITES.move_to_end(key)
+            _STATS["hits"] += 1
+            return _SPRITES[key]
+
+    image = _draw_centred(text, font, fill, canvas)
+    if angle:
+        image = image.rotate(angle, expand=1)
+    sprite = trim_layer(image)
+
+    with _SPRITES_LOCK:
+        _STATS["misses"] += 1
+        _SPRITES[key] = sprite
+        while len(_SPRITES) > MAX_SPRITES:
+            _SPRITES.popitem(last=False)
+    return sprite
+
+def get_sprite_stats() -> dict:
+    """Return sprite cache hits, misses and size."""
+    with _SPRITES_LOCK:
+        stats = dict(_STATS)
+        stats["entries"] = len(_SPRITES)
+    return stats
+
+def clear_sprite_cache() -> None:
+    """Drop all cached sprites."""
+    with _SPRITES_LOCK:
+        _SPRITES.clear()
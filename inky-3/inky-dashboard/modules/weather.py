@@ -4,7 +4,8 @@ Draws min, current, and max temperature with a weather icon.
 """
 
 from modules.weather_data import get_weather_icon_path
-from PIL import Image, ImageFont
+from modules.asset_cache import load_image
+from modules.fonts import get_font, DEJAVU_BOLD_PATH
 import logging
 from colors import COLORS
 import os
@@ -17,19 +18,13 @@ def draw_weather(draw, image, x, y, weather_data):
     """
     weather = weather_data
     if "error" in weather:
-        try:
-            error_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 40)
-        except Exception:
-            error_font = ImageFont.load_default()
+        error_font = get_font(DEJAVU_BOLD_PATH, 40)
         draw.text((x, y), "Weather Error", fill=COLORS["red"], font=error_font)
         logging.warning("Weather data contained error; displayed error notice")
         return
 
     # Try to load a big, clear font
-    try:
-        big_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 70)
-    except Exception:
-        big_font = ImageFont.load_default()
+    big_font = get_font(DEJAVU_BOLD_PATH, 70)
 
     # Extract temps
     temp_min = weather.get("temp_min", "--")
@@ -70,8 +65,11 @@ def draw_weather(draw, image, x, y, weather_data):
     icon_path = get_weather_icon_path(weather)
     try:
         if os.path.exists(icon_path):
-            icon = Image.open(icon_path).convert("RGBA")
-            icon = icon.resize((200, 200))
-            image.paste(icon, (x - 200, y - 1), icon)
+            icon = load_image(icon_path, "RGBA", (200, 200))
+            if image.mode == "RGBA":
+                # Drawing onto a transparent layer: keep the icon's own alpha
+                image.alpha_composite(icon, (x - 200, y - 1))
+            else:
+                image.paste(icon, (x - 200, y - 1), icon)
     except Exception as e:
         logging.warning(f"Failed to paste weather icon {icon_path}: {e}")